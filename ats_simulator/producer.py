@@ -2,13 +2,14 @@
 ATS (Automatic Train Supervision) Telemetry Simulator
 Generates realistic train telemetry data and publishes to Kafka
 """
-import json
-import time
 import random
 import signal
 import sys
+import threading
+import time
 from datetime import datetime
 from confluent_kafka import Producer, KafkaException
+import orjson
 import os
 import logging
 
@@ -28,8 +29,9 @@ conf = {
     'retry.backoff.ms': 1000,  # Wait 1s between retries
     'max.in.flight.requests.per.connection': 1,  # Ensure ordering
     'compression.type': 'snappy',  # Compress messages
-    'linger.ms': 100,  # Batch messages for 100ms
-    'batch.size': 16384  # Batch size in bytes
+    'linger.ms': 500,  # Batch messages for up to 500ms
+    'batch.size': 200000,  # Batch size in bytes
+    'queue.buffering.max.messages': 100000  # Local queue depth before produce() blocks
 }
 
 # Initialize producer with error handling
@@ -50,40 +52,69 @@ PUBLISH_INTERVAL_SECONDS = 30
 TRAIN_ID_RANGE = (100, 999)
 SPEED_MAX_KMH = 80
 
-# Graceful shutdown flag
-shutdown_flag = False
+# Client-side batching: records are handed to librdkafka in bursts of at
+# most BATCH_MAX, and none is held back longer than BATCH_LINGER_MS. A
+# batch only holds more than one record when PUBLISH_INTERVAL_SECONDS is
+# shorter than the linger window; at the default 30 s interval every
+# record is published as soon as it is generated
+BATCH_MAX = 500
+BATCH_LINGER_MS = 200
+
+# Hot-path bindings used by generate_telemetry; a dedicated generator keeps
+# the simulator independent of the shared module-level random state
+_rng = random.Random()
+_rand_int = _rng.randint
+_rand_uni = _rng.uniform
+_utcnow = datetime.utcnow
+
+# Serialize naive UTC datetimes as ISO-8601 with a trailing "Z"
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+# Graceful shutdown event; waiting on it instead of sleeping lets a signal
+# interrupt the publish interval immediately
+_shutdown = threading.Event()
 
 def signal_handler(signum, frame):
     """Handle shutdown signals gracefully"""
-    global shutdown_flag
     logger.info(f"Received signal {signum}, initiating graceful shutdown...")
-    shutdown_flag = True
+    _shutdown.set()
 
 # Register signal handlers
 signal.signal(signal.SIGTERM, signal_handler)
 signal.signal(signal.SIGINT, signal_handler)
 
+# Fields every telemetry record must carry
+_REQUIRED_FIELDS = frozenset(['timestamp', 'train_id', 'passenger_count', 'total_weight_tons',
+                              'power_draw_kw', 'speed_kmh', 'location', 'alerts'])
+
 def validate_telemetry(data):
     """Validate telemetry data before sending"""
-    required_fields = ['timestamp', 'train_id', 'passenger_count', 'total_weight_tons', 
-                       'power_draw_kw', 'speed_kmh', 'location', 'alerts']
-    
-    for field in required_fields:
-        if field not in data:
-            logger.error(f"Missing required field: {field}")
-            return False
-    
-    # Validate ranges
-    if not (0 <= data['passenger_count'] <= MAX_PASSENGERS):
-        logger.error(f"Invalid passenger count: {data['passenger_count']}")
+    missing = _REQUIRED_FIELDS - data.keys()
+    if missing:
+        logger.error("Missing required fields: %s", sorted(missing))
         return False
     
-    if data['speed_kmh'] < 0 or data['speed_kmh'] > SPEED_MAX_KMH:
-        logger.error(f"Invalid speed: {data['speed_kmh']}")
+    # Validate ranges
+    passenger_count = data['passenger_count']
+    speed = data['speed_kmh']
+    if not (0 <= passenger_count <= MAX_PASSENGERS and 0 <= speed <= SPEED_MAX_KMH):
+        logger.error("Invalid telemetry ranges: passengers=%s speed=%s", passenger_count, speed)
         return False
     
     return True
 
+# (low, high) passenger ranges indexed by [weekday][hour], 0=Monday
+_PEAK_HOURS = (7, 8, 9, 10, 17, 18, 19, 20)
+_PASSENGER_RANGES = tuple(
+    tuple(
+        (20, 100) if weekday >= 5
+        else (200, MAX_PASSENGERS) if hour in _PEAK_HOURS
+        else (50, 200)
+        for hour in range(24)
+    )
+    for weekday in range(7)
+)
+
 def simulate_passenger_count():
     """
     Simulate realistic passenger count based on time of day and weekday.
@@ -97,20 +128,8 @@ def simulate_passenger_count():
         int: Passenger count between 0 and MAX_PASSENGERS
     """
     now = datetime.now()
-    hour = now.hour
-    weekday = now.weekday()  # 0=Monday, 6=Sunday
-    
-    # Weekend logic
-    if weekday >= 5:
-        base = random.randint(20, 100)
-    # Peak hours (morning and evening rush)
-    elif 7 <= hour <= 10 or 17 <= hour <= 20:
-        base = random.randint(200, MAX_PASSENGERS)
-    # Off-peak hours
-    else:
-        base = random.randint(50, 200)
-    
-    return min(base, MAX_PASSENGERS)
+    low, high = _PASSENGER_RANGES[now.weekday()][now.hour]
+    return _rand_int(low, high)
 
 def calculate_total_weight(passenger_count):
     """Calculate total train weight including passengers"""
@@ -120,31 +139,49 @@ def calculate_total_weight(passenger_count):
 def estimate_power_draw(weight):
     """Estimate power draw based on total weight"""
     # Base power + weight-dependent component
-    power = 80 + (0.5 * weight)
-    return round(power, 2)
+    return 80 + (0.5 * weight)
+
+# Reusable telemetry record; generate_telemetry overwrites the dynamic
+# fields in place instead of allocating a fresh nested dict per call
+_TELEMETRY = {
+    "timestamp": None,
+    "train_id": None,
+    "passenger_count": 0,
+    "total_weight_tons": 0.0,
+    "power_draw_kw": 0.0,
+    "speed_kmh": 0.0,
+    "location": {"latitude": 0.0, "longitude": 0.0},
+    "alerts": {"overcrowding": False, "high_power_draw": False}
+}
+_LOCATION = _TELEMETRY["location"]
+_ALERTS = _TELEMETRY["alerts"]
 
 def generate_telemetry():
-    """Generate a single telemetry record"""
+    """
+    Generate a single telemetry record.
+    
+    Numeric fields are left unrounded; orjson emits compact floats and
+    consumers format them for display.
+    
+    Returns:
+        dict: The shared telemetry record, valid until the next call.
+        Serialize it (or copy it) before generating another one.
+    """
     passenger_count = simulate_passenger_count()
     total_weight = calculate_total_weight(passenger_count)
     power_draw = estimate_power_draw(total_weight)
     
-    telemetry = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "train_id": f"A{random.randint(100, 999)}",
-        "passenger_count": passenger_count,
-        "total_weight_tons": round(total_weight, 2),
-        "power_draw_kw": power_draw,
-        "speed_kmh": round(random.uniform(0, 80), 2),
-        "location": {
-            "latitude": round(random.uniform(40.7, 40.9), 6),
-            "longitude": round(random.uniform(-74.1, -73.9), 6)
-        },
-        "alerts": {
-            "overcrowding": passenger_count > MAX_PASSENGER_LOAD,
-            "high_power_draw": power_draw > MAX_POWER_DRAW_KW
-        }
-    }
+    telemetry = _TELEMETRY
+    telemetry["timestamp"] = _utcnow()  # serialized natively by orjson
+    telemetry["train_id"] = "A" + str(_rand_int(*TRAIN_ID_RANGE))
+    telemetry["passenger_count"] = passenger_count
+    telemetry["total_weight_tons"] = total_weight
+    telemetry["power_draw_kw"] = power_draw
+    telemetry["speed_kmh"] = _rand_uni(0, SPEED_MAX_KMH)
+    _LOCATION["latitude"] = _rand_uni(40.7, 40.9)
+    _LOCATION["longitude"] = _rand_uni(-74.1, -73.9)
+    _ALERTS["overcrowding"] = passenger_count > MAX_PASSENGER_LOAD
+    _ALERTS["high_power_draw"] = power_draw > MAX_POWER_DRAW_KW
     
     return telemetry
 
@@ -152,20 +189,56 @@ def delivery_report(err, msg):
     """
     Callback for Kafka producer delivery reports.
     
+    Only failures are logged; successful deliveries return immediately
+    without touching the message. Aggregate delivery metrics belong in
+    librdkafka's stats_cb rather than here.
+    
     Args:
         err: Error object if delivery failed
-        msg: Message object if delivery succeeded
+        msg: Message object for the delivered (or failed) record
     """
     if err is not None:
-        logger.error(f'Message delivery failed: {err}')
-    else:
-        logger.debug(f'Message delivered to {msg.topic()} [{msg.partition()}] at offset {msg.offset()}')
+        logger.error('Message delivery failed: %s', err)
+
+def publish_batch(batch):
+    """
+    Hand a batch of serialized telemetry records to the Kafka producer.
+    
+    Records are produced one by one; linger.ms lets librdkafka coalesce
+    them into as few produce requests as possible.
+    
+    Args:
+        batch: List of JSON-encoded telemetry payloads (bytes)
+    """
+    for payload in batch:
+        producer.produce(
+            'ats_telemetry',
+            value=payload,
+            callback=delivery_report
+        )
+    
+    # Serve delivery callbacks without blocking; the shutdown path
+    # flushes whatever is still in flight
+    producer.poll(0)
+
+def log_published(summaries):
+    """
+    Log the records of a batch that was handed to the producer.
+    
+    Args:
+        summaries: (train_id, passenger_count, power_draw_kw, alerts) per record
+    """
+    for train_id, passenger_count, power_draw_kw, alerts in summaries:
+        # Deferred %-formatting: skipped entirely when INFO is filtered
+        logger.info("📊 Published: Train %s | Passengers: %d | Power: %.2fkW | Alerts: %s",
+                    train_id, passenger_count, power_draw_kw, alerts)
 
 def run_simulator():
     """
     Main simulator loop with graceful shutdown and error handling.
     
-    Publishes telemetry every PUBLISH_INTERVAL_SECONDS until shutdown signal received.
+    Generates telemetry every PUBLISH_INTERVAL_SECONDS and publishes it in
+    batches (see BATCH_MAX / BATCH_LINGER_MS) until shutdown signal received.
     """
     logger.info("🚆 Starting ATS Telemetry Simulator...")
     logger.info(f"📡 Publishing to Kafka at {conf['bootstrap.servers']}")
@@ -174,35 +247,46 @@ def run_simulator():
     consecutive_failures = 0
     max_consecutive_failures = 5
     
-    while not shutdown_flag:
+    batch = []
+    summaries = []  # Log fields of each batched record, in batch order
+    batch_started = 0.0
+    
+    while not _shutdown.is_set():
         try:
             data = generate_telemetry()
             
             # Validate data before sending
-            if not validate_telemetry(data):
+            if validate_telemetry(data):
+                if not batch:
+                    batch_started = time.monotonic()
+                batch.append(orjson.dumps(data, option=ORJSON_OPTIONS))
+                # The record dict is reused, so keep a copy of its alerts
+                summaries.append((data['train_id'], data['passenger_count'],
+                                  data['power_draw_kw'], dict(data['alerts'])))
+            else:
                 logger.warning("Skipping invalid telemetry data")
-                time.sleep(PUBLISH_INTERVAL_SECONDS)
-                continue
-            
-            # Publish to Kafka
-            producer.produce(
-                'ats_telemetry',
-                value=json.dumps(data),
-                callback=delivery_report
-            )
             
-            # Flush with timeout to ensure delivery
-            producer.flush(timeout=10)
+            # Publish once the batch is full or the next record would
+            # arrive after the linger window closes (always the case while
+            # PUBLISH_INTERVAL_SECONDS exceeds BATCH_LINGER_MS)
+            if batch:
+                elapsed_ms = (time.monotonic() - batch_started) * 1000
+                if (len(batch) >= BATCH_MAX or
+                        elapsed_ms + PUBLISH_INTERVAL_SECONDS * 1000 >= BATCH_LINGER_MS):
+                    try:
+                        publish_batch(batch)
+                        log_published(summaries)
+                    finally:
+                        # A failed batch is dropped and reported by the
+                        # handlers below, never logged as published
+                        batch.clear()
+                        summaries.clear()
+                    
+                    # Reset failure counter on success
+                    consecutive_failures = 0
             
-            # Reset failure counter on success
-            consecutive_failures = 0
-            
-            logger.info(f"📊 Published: Train {data['train_id']} | "
-                       f"Passengers: {data['passenger_count']} | "
-                       f"Power: {data['power_draw_kw']}kW | "
-                       f"Alerts: {data['alerts']}")
-            
-            time.sleep(PUBLISH_INTERVAL_SECONDS)
+            if _shutdown.wait(PUBLISH_INTERVAL_SECONDS):
+                break
             
         except KafkaException as e:
             consecutive_failures += 1
@@ -212,15 +296,21 @@ def run_simulator():
                 logger.critical("Max consecutive failures reached. Shutting down.")
                 break
             
-            time.sleep(5)
+            _shutdown.wait(5)
             
         except Exception as e:
             consecutive_failures += 1
             logger.error(f"Unexpected error: {e}")
-            time.sleep(5)
+            _shutdown.wait(5)
     
     # Graceful shutdown
     logger.info("Flushing remaining messages...")
+    if batch:
+        try:
+            publish_batch(batch)
+            log_published(summaries)
+        except Exception as e:
+            logger.error(f"Failed to publish final batch: {e}")
     producer.flush(timeout=30)
     logger.info("🛑 Simulator stopped gracefully")
 
@@ -5,23 +5,35 @@ Registers the Snowflake sink connector with Kafka Connect
 """
 import json
 import time
+import random
 import sys
 import os
-import urllib.request
+import re
+import io
+import http.client
 import urllib.error
 from pathlib import Path
+import orjson
+
+# File locations, resolved once relative to this script
+_HERE = Path(__file__).resolve().parent
+_CONFIG_PATH = _HERE / 'snowflake_connector_config.json'
+_ENV_PATH = _HERE.parent / '.env'
+
+# KEY=value assignments in .env; blank lines and # comments never match
+_ENV_LINE_RE = re.compile(r'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.MULTILINE)
 
 # Load environment variables from .env file
 def load_env_file():
-    """Load .env file from project root"""
-    env_path = Path(__file__).parent.parent / '.env'
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#') and '=' in line:
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+    """
+    Load .env file from project root.
+    
+    Variables already present in the environment (e.g. injected by Docker)
+    take precedence over values from the file.
+    """
+    if _ENV_PATH.exists():
+        for match in _ENV_LINE_RE.finditer(_ENV_PATH.read_text()):
+            os.environ.setdefault(match.group(1), match.group(2))
 
 load_env_file()
 
@@ -32,9 +44,58 @@ class Colors:
     RED = '\033[91m'
     RESET = '\033[0m'
 
+_RESET = Colors.RESET
+_write = sys.stdout.write
+
+def colored(message, color):
+    """Wrap message in color escape codes"""
+    return color + message + _RESET
+
 def print_color(message, color):
     """Print colored message"""
-    print(f"{color}{message}{Colors.RESET}")
+    _write(color)
+    _write(message)
+    _write(_RESET)
+    _write("\n")
+
+def format_json(data):
+    """Pretty-print a JSON value with two-space indentation"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+
+def print_block(lines):
+    """Print several lines with a single write"""
+    _write("\n".join(lines))
+    _write("\n")
+
+# ${VAR} placeholders in the connector config template
+_ENV_VAR_RE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+def _substitute_env(value):
+    """Replace ${VAR} placeholders in every string leaf of a parsed JSON value"""
+    if isinstance(value, str):
+        return _ENV_VAR_RE.sub(lambda m: os.environ.get(m.group(1), m.group(0)), value)
+    if isinstance(value, dict):
+        return {k: _substitute_env(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute_env(v) for v in value]
+    return value
+
+def _find_unresolved(value, field=None):
+    """Return (field, var) for the first placeholder left unsubstituted, or None"""
+    if isinstance(value, str):
+        match = _ENV_VAR_RE.search(value)
+        return (field, match.group(1)) if match else None
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = ((field, v) for v in value)
+    else:
+        return None
+    for key, child in items:
+        found = _find_unresolved(child, key)
+        if found:
+            return found
+    return None
 
 def load_connector_config():
     """
@@ -44,24 +105,18 @@ def load_connector_config():
         dict: Connector configuration with env vars substituted
     """
     try:
-        config_path = os.path.join(os.path.dirname(__file__), 'snowflake_connector_config.json')
-        with open(config_path, 'r') as f:
+        with open(_CONFIG_PATH, 'r') as f:
             config = json.load(f)
         
-        # Substitute environment variables
-        config_str = json.dumps(config)
-        for key, value in os.environ.items():
-            if key.startswith('SNOWFLAKE_'):
-                config_str = config_str.replace(f'${{{key}}}', value)
+        # Substitute environment variables in a single pass over the tree
+        config = _substitute_env(config)
         
-        config = json.loads(config_str)
-        
-        # Validate required fields
-        required_fields = ['snowflake.url.name', 'snowflake.user.name', 'snowflake.database.name']
-        for field in required_fields:
-            if f'${{{field}' in json.dumps(config):
-                print_color(f"❌ Error: Environment variable not set for {field}", Colors.RED)
-                sys.exit(1)
+        # Validate that every placeholder was resolved
+        unresolved = _find_unresolved(config)
+        if unresolved:
+            field, var = unresolved
+            print_color(f"❌ Error: Environment variable {var} not set for {field}", Colors.RED)
+            sys.exit(1)
         
         return config
         
@@ -73,19 +128,69 @@ def load_connector_config():
         print_color(f"❌ Error: Invalid JSON in config file: {e}", Colors.RED)
         sys.exit(1)
 
-def wait_for_kafka_connect(max_retries=30):
-    """Wait for Kafka Connect to be ready"""
+# Kafka Connect REST API; one keep-alive connection is shared by all requests
+KAFKA_CONNECT_HOST = 'localhost'
+KAFKA_CONNECT_PORT = 8083
+_conn = http.client.HTTPConnection(KAFKA_CONNECT_HOST, KAFKA_CONNECT_PORT, timeout=5)
+
+def kafka_connect_request(path, data=None, method=None, timeout=10):
+    """
+    Send a request to the Kafka Connect REST API over the shared connection.
+    
+    Args:
+        path: Request path, e.g. '/connectors'
+        data: Optional JSON request body as bytes
+        method: HTTP method (default: POST with a body, GET without)
+        timeout: Socket timeout in seconds
+        
+    Returns:
+        bytes: Response body
+        
+    Raises:
+        urllib.error.HTTPError: If the server responds with an error status
+    """
+    method = method or ('POST' if data is not None else 'GET')
+    headers = {'Content-Type': 'application/json'} if data is not None else {}
+    
+    _conn.timeout = timeout
+    if _conn.sock is not None:
+        _conn.sock.settimeout(timeout)
+    
+    try:
+        _conn.request(method, path, body=data, headers=headers)
+        response = _conn.getresponse()
+        body = response.read()
+    except (OSError, http.client.HTTPException):
+        # Drop the broken socket; the next request reconnects
+        _conn.close()
+        raise
+    
+    if response.status >= 400:
+        url = f"http://{KAFKA_CONNECT_HOST}:{KAFKA_CONNECT_PORT}{path}"
+        raise urllib.error.HTTPError(url, response.status, response.reason,
+                                     response.headers, io.BytesIO(body))
+    return body
+
+def wait_for_kafka_connect(max_retries=30, initial_delay=0.2, max_delay=2.0):
+    """
+    Wait for Kafka Connect to be ready.
+    
+    Retries with jittered exponential backoff starting at initial_delay and
+    capped at max_delay, so a fast startup is noticed within a fraction of
+    a second while the worst case stays around a minute.
+    """
     print_color("Waiting for Kafka Connect to be ready...", Colors.YELLOW)
     
+    delay = initial_delay
     for i in range(max_retries):
         try:
-            req = urllib.request.Request("http://localhost:8083/")
-            urllib.request.urlopen(req, timeout=5)
+            kafka_connect_request('/', timeout=5)
             print_color("✅ Kafka Connect is ready!", Colors.GREEN)
             return True
         except Exception:
             print(f"  Attempt {i+1}/{max_retries}...", end='\r')
-            time.sleep(2)
+            time.sleep(delay + random.random() * 0.1)
+            delay = min(delay * 1.5, max_delay)
     
     print_color("\n❌ Kafka Connect is not responding after 60 seconds", Colors.RED)
     return False
@@ -95,22 +200,12 @@ def register_connector(config):
     print_color("\n🔧 Registering Snowflake Sink Connector...", Colors.CYAN)
     
     try:
-        # Prepare request
-        url = "http://localhost:8083/connectors"
-        data = json.dumps(config).encode('utf-8')
-        
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={'Content-Type': 'application/json'}
-        )
-        
         # Send request
-        response = urllib.request.urlopen(req, timeout=10)
-        result = json.loads(response.read().decode())
+        data = orjson.dumps(config)
+        result = orjson.loads(kafka_connect_request('/connectors', data))
         
         print_color("✅ Connector registered successfully!", Colors.GREEN)
-        print(json.dumps(result, indent=2))
+        print(format_json(result))
         return True
         
     except urllib.error.HTTPError as e:
@@ -129,21 +224,13 @@ def update_connector(config):
     """Update existing connector configuration"""
     try:
         connector_name = config['name']
-        url = f"http://localhost:8083/connectors/{connector_name}/config"
-        data = json.dumps(config['config']).encode('utf-8')
-        
-        req = urllib.request.Request(
-            url,
-            data=data,
-            headers={'Content-Type': 'application/json'},
-            method='PUT'
-        )
+        data = orjson.dumps(config['config'])
         
-        response = urllib.request.urlopen(req, timeout=10)
-        result = json.loads(response.read().decode())
+        response = kafka_connect_request(f'/connectors/{connector_name}/config', data, method='PUT')
+        result = orjson.loads(response)
         
         print_color("✅ Connector updated successfully!", Colors.GREEN)
-        print(json.dumps(result, indent=2))
+        print(format_json(result))
         return True
         
     except Exception as e:
@@ -155,12 +242,10 @@ def check_connector_status(connector_name):
     print_color("\n📊 Checking connector status...", Colors.CYAN)
     
     try:
-        url = f"http://localhost:8083/connectors/{connector_name}/status"
-        req = urllib.request.Request(url)
-        response = urllib.request.urlopen(req, timeout=10)
-        status = json.loads(response.read().decode())
+        response = kafka_connect_request(f'/connectors/{connector_name}/status')
+        status = orjson.loads(response)
         
-        print(json.dumps(status, indent=2))
+        print(format_json(status))
         
         # Check if connector is running
         connector_state = status.get('connector', {}).get('state')
@@ -177,17 +262,22 @@ def check_connector_status(connector_name):
 
 def main():
     """Main function"""
-    print_color("=" * 80, Colors.CYAN)
-    print_color("🚀 Snowflake Kafka Connector Registration", Colors.CYAN)
-    print_color("=" * 80, Colors.CYAN)
-    print()
+    banner = colored("=" * 80, Colors.CYAN)
+    print_block([
+        banner,
+        colored("🚀 Snowflake Kafka Connector Registration", Colors.CYAN),
+        banner,
+        "",
+    ])
     
     # Wait for Kafka Connect
     if not wait_for_kafka_connect():
-        print_color("\n💡 Tips:", Colors.YELLOW)
-        print("  1. Make sure Docker containers are running: docker-compose ps")
-        print("  2. Check Kafka Connect logs: docker-compose logs kafka-connect")
-        print("  3. Wait a bit longer and try again")
+        print_block([
+            colored("\n💡 Tips:", Colors.YELLOW),
+            "  1. Make sure Docker containers are running: docker-compose ps",
+            "  2. Check Kafka Connect logs: docker-compose logs kafka-connect",
+            "  3. Wait a bit longer and try again",
+        ])
         sys.exit(1)
     
     # Load configuration
@@ -195,26 +285,30 @@ def main():
     
     # Register connector
     if not register_connector(config):
-        print_color("\n💡 If this persists:", Colors.YELLOW)
-        print("  1. Check your .env file has correct Snowflake credentials")
-        print("  2. Verify Snowflake user has RSA public key assigned")
-        print("  3. Check connector logs: docker-compose logs kafka-connect")
+        print_block([
+            colored("\n💡 If this persists:", Colors.YELLOW),
+            "  1. Check your .env file has correct Snowflake credentials",
+            "  2. Verify Snowflake user has RSA public key assigned",
+            "  3. Check connector logs: docker-compose logs kafka-connect",
+        ])
         sys.exit(1)
     
     # Check status
     time.sleep(2)
     check_connector_status(config['name'])
     
-    print()
-    print_color("=" * 80, Colors.CYAN)
-    print_color("✨ Connector registration complete!", Colors.GREEN)
-    print_color("=" * 80, Colors.CYAN)
-    print()
-    print_color("📝 Next steps:", Colors.CYAN)
-    print("  1. Verify data is flowing: docker-compose logs ats-simulator")
-    print("  2. Check Snowflake: SELECT COUNT(*) FROM ATS_RAW_JSON;")
-    print("  3. Open dashboard: http://localhost:8501")
-    print()
+    print_block([
+        "",
+        banner,
+        colored("✨ Connector registration complete!", Colors.GREEN),
+        banner,
+        "",
+        colored("📝 Next steps:", Colors.CYAN),
+        "  1. Verify data is flowing: docker-compose logs ats-simulator",
+        "  2. Check Snowflake: SELECT COUNT(*) FROM ATS_RAW_JSON;",
+        "  3. Open dashboard: http://localhost:8501",
+        "",
+    ])
 
 if __name__ == "__main__":
     main()
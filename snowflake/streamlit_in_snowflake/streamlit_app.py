@@ -6,16 +6,58 @@ Visualizing train telemetry data using Snowpark
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 from datetime import datetime
 
-# Get Snowflake session (automatically provided in Streamlit-in-Snowflake)
-session = get_active_session()
+# Snowflake session (automatically provided in Streamlit-in-Snowflake)
+@st.cache_resource
+def _session():
+    """Return the app's Snowpark session, resolved once per process"""
+    return get_active_session()
+
+def start_query(query, params=None):
+    """
+    Submit a query as an asynchronous job on the app's session.
+    
+    Args:
+        query: SQL query string
+        params: Optional bind parameters
+        
+    Returns:
+        str: Query id of the submitted job
+    """
+    return _session().sql(query, params=params).collect_nowait().query_id
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def query_result(query_id):
+    """
+    Wait for an asynchronous query and fetch its result.
+    
+    Cached by query id, so a job reused from a start_* cache entry is only
+    downloaded once.
+    
+    Args:
+        query_id: Id returned by start_query
+        
+    Returns:
+        pd.DataFrame: Query results
+    """
+    return _session().create_async_job(query_id).result("pandas")
 
 # Configuration constants
 MAX_DATA_POINTS = 500
+DATA_LIMIT_OPTIONS = [50, 100, 200, 500]  # Canonical slider positions
 DEFAULT_DATA_LIMIT = 100
+CONNECTION_CHECK_TTL_SECONDS = 300  # Re-verify the session every 5 minutes
+HISTOGRAM_BINS = 30  # Passenger distribution bins
+
+# Alert card markup, filled from one ATS_ALERTS row
+ALERT_TEMPLATE = (
+    '<div class="alert-box alert-{LEVEL}">'
+    '{ICON} <strong>{ALERT_TYPE}</strong> - Train {TRAIN_ID} at {TIMESTAMP}<br>'
+    'Passengers: {PASSENGER_COUNT} | Power: {POWER_DRAW_KW:.2f} kW'
+    '</div>'
+)
 
 # Page configuration
 st.set_page_config(
@@ -59,46 +101,51 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=60)
-def get_latest_data(limit=DEFAULT_DATA_LIMIT):
+@st.cache_data(ttl=60, max_entries=8, show_spinner=False)
+def start_latest_data(limit=DEFAULT_DATA_LIMIT):
     """
-    Fetch latest telemetry data with limit using Snowpark.
+    Start fetching latest telemetry data with limit using Snowpark.
     
     Args:
         limit: Maximum number of records to fetch (default: 100)
         
     Returns:
-        pd.DataFrame: Latest telemetry data
+        str: Query id; its result holds the latest telemetry readings used
+        by the charts, oldest first
     """
     # Enforce maximum limit to prevent memory issues
     limit = min(limit, MAX_DATA_POINTS)
     
-    query = f"""
-    SELECT 
-        timestamp,
-        train_id,
-        passenger_count,
-        total_weight_tons,
-        power_draw_kw,
-        speed_kmh,
-        latitude,
-        longitude,
-        is_overcrowded,
-        is_high_power_draw
-    FROM ATS_DB.ATS_SCHEMA.ATS_TRANSFORMED
-    WHERE timestamp >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
-    ORDER BY timestamp DESC
-    LIMIT {limit}
+    # Take the most recent rows, then return them oldest first so the
+    # timelines can plot them without re-sorting
+    query = """
+    WITH latest AS (
+        SELECT 
+            timestamp,
+            train_id,
+            passenger_count,
+            power_draw_kw,
+            speed_kmh
+        FROM ATS_DB.ATS_SCHEMA.ATS_TRANSFORMED
+        -- timestamp is UTC wall time (TIMESTAMP_NTZ), so every window is
+        -- measured from SYSDATE() (UTC NTZ) rather than CURRENT_TIMESTAMP(),
+        -- which is in the session time zone
+        WHERE timestamp >= DATEADD(hour, -24, SYSDATE())
+        ORDER BY timestamp DESC
+        LIMIT ?
+    )
+    SELECT * FROM latest
+    ORDER BY timestamp ASC
     """
-    return session.sql(query).to_pandas()
+    return start_query(query, [limit])
 
-@st.cache_data(ttl=60)
-def get_alerts():
+@st.cache_data(ttl=60, max_entries=8, show_spinner=False)
+def start_alerts():
     """
-    Fetch recent active alerts (last 24 hours only).
+    Start fetching recent active alerts (last 24 hours only).
     
     Returns:
-        pd.DataFrame: Recent alerts data
+        str: Query id; its result holds the recent alerts
     """
     query = """
     SELECT 
@@ -106,22 +153,21 @@ def get_alerts():
         train_id,
         alert_type,
         passenger_count,
-        power_draw_kw,
-        total_weight_tons
+        power_draw_kw
     FROM ATS_DB.ATS_SCHEMA.ATS_ALERTS
-    WHERE timestamp >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
+    WHERE timestamp >= DATEADD(hour, -24, SYSDATE())
     ORDER BY timestamp DESC
     LIMIT 50
     """
-    return session.sql(query).to_pandas()
+    return start_query(query)
 
-@st.cache_data(ttl=60)
-def get_hourly_stats():
+@st.cache_data(ttl=600, max_entries=4, show_spinner=False)
+def start_hourly_stats():
     """
-    Fetch hourly statistics for the last 24 hours.
+    Start fetching hourly statistics for the last 24 hours.
     
     Returns:
-        pd.DataFrame: Hourly aggregated statistics
+        str: Query id; its result holds the hourly aggregated statistics
     """
     query = """
     SELECT 
@@ -135,114 +181,209 @@ def get_hourly_stats():
         overcrowding_incidents,
         high_power_incidents
     FROM ATS_DB.ATS_SCHEMA.ATS_HOURLY_STATS
-    WHERE hour >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
+    -- Compare the grouping key with an hour boundary so the filter can be pushed
+    -- below the view's GROUP BY and prunes ATS_TRANSFORMED by timestamp
+    WHERE hour >= DATE_TRUNC('hour', DATEADD(hour, -24, SYSDATE()))
     ORDER BY hour DESC
     LIMIT 24
     """
-    return session.sql(query).to_pandas()
+    return start_query(query)
 
-@st.cache_data(ttl=60)
-def get_train_status():
+@st.cache_data(ttl=30, max_entries=4, show_spinner=False)
+def start_train_status():
     """
-    Fetch latest status for each train (active in last hour).
+    Start fetching latest status for each train (active in last hour).
     
     Returns:
-        pd.DataFrame: Current status of all active trains
+        str: Query id; its result holds the current status of all active
+        trains, ready to display
     """
     query = """
     SELECT 
         train_id,
         timestamp,
         passenger_count,
-        total_weight_tons,
         power_draw_kw,
         speed_kmh,
-        is_overcrowded,
-        is_high_power_draw
+        CASE WHEN is_overcrowded OR is_high_power_draw
+             THEN '🔴 ALERT' ELSE '✅ OK' END AS status
     FROM ATS_DB.ATS_SCHEMA.ATS_LATEST_STATUS
-    WHERE timestamp >= DATEADD(hour, -1, CURRENT_TIMESTAMP())
+    WHERE timestamp >= DATEADD(hour, -1, SYSDATE())
     ORDER BY train_id
     """
-    return session.sql(query).to_pandas()
+    return start_query(query)
 
-# Main Dashboard
-def main():
-    # Header with Snowflake Native badge
-    st.markdown('<div class="sis-badge">🌨️ Snowflake Native App</div>', unsafe_allow_html=True)
-    st.title("🚆 ATS Real-Time Monitoring Dashboard")
-    st.markdown("*Automatic Train Supervision System - Live Telemetry (Streamlit-in-Snowflake)*")
+@st.cache_data(ttl=60, max_entries=4, show_spinner=False)
+def start_kpis():
+    """
+    Start fetching last-hour KPI aggregates, computed in Snowflake.
     
-    # Sidebar
-    st.sidebar.header("⚙️ Dashboard Controls")
-    auto_refresh = st.sidebar.checkbox("Auto-refresh", value=True)
-    refresh_interval = st.sidebar.slider("Refresh interval (seconds)", 10, 60, 30)
-    data_limit = st.sidebar.slider("Data points to display", 50, 500, 100)
+    Returns:
+        str: Query id; its single result row holds AVG_PASSENGER_COUNT,
+        AVG_POWER_DRAW_KW and ACTIVE_TRAINS
+    """
+    query = """
+    SELECT 
+        AVG(passenger_count) AS avg_passenger_count,
+        AVG(power_draw_kw) AS avg_power_draw_kw,
+        COUNT(DISTINCT train_id) AS active_trains
+    FROM ATS_DB.ATS_SCHEMA.ATS_TRANSFORMED
+    WHERE timestamp >= DATEADD(hour, -1, SYSDATE())
+    """
+    return start_query(query)
+
+def passenger_histogram(df):
+    """
+    Bin the charted readings' passenger counts.
     
-    if st.sidebar.button("🔄 Refresh Now"):
-        st.cache_data.clear()
-        st.rerun()
+    Uses HISTOGRAM_BINS equal-width bins from 0 up to the busiest reading,
+    so the bins cover the counts actually charted.
     
-    # Status indicator
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📡 Connection Status")
-    try:
-        # Test session
-        session.sql("SELECT CURRENT_VERSION()").collect()
-        st.sidebar.success("✅ Connected to Snowflake")
-        st.sidebar.info(f"**Session ID:** {session.get_current_account()}")
-    except Exception as e:
-        st.sidebar.error(f"❌ Connection Failed: {e}")
-        return
+    Args:
+        df: Non-empty telemetry readings from start_latest_data
+        
+    Returns:
+        tuple: (readings per bin, bin edges) as numpy arrays
+    """
+    counts = df['PASSENGER_COUNT'].to_numpy()
+    return np.histogram(counts, bins=HISTOGRAM_BINS, range=(0, max(counts.max(), 1)))
+
+def speed_quartiles(df):
+    """
+    Summarize the charted readings' speeds per train.
     
-    # Fetch data
-    with st.spinner("Loading data from Snowflake..."):
+    Args:
+        df: Telemetry readings from start_latest_data
+        
+    Returns:
+        pd.DataFrame: One row per TRAIN_ID with the 0, 0.25, 0.5, 0.75 and 1
+        speed quantiles as columns
+    """
+    return df.groupby('TRAIN_ID')['SPEED_KMH'].quantile([0, 0.25, 0.5, 0.75, 1]).unstack()
+
+def kpi_value(kpis, key):
+    """Return a KPI aggregate, treating missing/NULL values as 0"""
+    value = kpis.get(key) if kpis else None
+    return 0 if pd.isna(value) else value
+
+def fetch_concurrently(starters):
+    """
+    Run independent dashboard queries concurrently on the one Snowpark session.
+    
+    Every dataset whose job is not cached is submitted before any result is
+    awaited, so the warehouse runs the queries together and a refresh costs
+    roughly the slowest one instead of their sum. The session is only used
+    from the script thread.
+    
+    A dataset that fails has its cached query id cleared, so the next rerun
+    submits a new job instead of re-reading the failed one until the TTL
+    expires.
+    
+    Args:
+        starters: Mapping of name to a (start_* function, args) pair
+        
+    Returns:
+        tuple: (results, errors) mappings of name to that query's result
+        DataFrame (None if it failed) and to the exception it raised
+    """
+    results, errors, query_ids = {}, {}, {}
+    for name, (start, args) in starters.items():
+        try:
+            query_ids[name] = start(*args)
+        except Exception as e:
+            results[name] = None
+            errors[name] = e
+    for name, query_id in query_ids.items():
         try:
-            df_latest = get_latest_data(data_limit)
-            df_alerts = get_alerts()
-            df_stats = get_hourly_stats()
-            df_trains = get_train_status()
+            results[name] = query_result(query_id)
         except Exception as e:
-            st.error(f"❌ Error loading data: {e}")
-            st.info("💡 Make sure the ATS pipeline is running and views are created.")
-            return
+            start, args = starters[name]
+            start.clear(*args)
+            results[name] = None
+            errors[name] = e
+    return results, errors
+
+def render_dashboard(data_limit):
+    """
+    Fetch the dashboard datasets and render every main-area panel.
+    
+    Runs as a Streamlit fragment so auto-refresh re-executes only this
+    panel, not the sidebar, header and connection check.
+    
+    Args:
+        data_limit: Number of telemetry points to chart
+    """
+    # Fetch data
+    with st.spinner("Loading data from Snowflake..."):
+        data, errors = fetch_concurrently({
+            'latest': (start_latest_data, (data_limit,)),
+            'alerts': (start_alerts, ()),
+            'stats': (start_hourly_stats, ()),
+            'trains': (start_train_status, ()),
+            'kpis': (start_kpis, ()),
+        })
+        df_latest = data['latest']
+        df_alerts = data['alerts']
+        df_stats = data['stats']
+        df_trains = data['trains']
+        df_kpis = data['kpis']
+        kpis = df_kpis.iloc[0].to_dict() if df_kpis is not None and not df_kpis.empty else None
+    
+    # One failed dataset only blanks its own panel
+    for name, error in errors.items():
+        st.error(f"❌ Error loading {name} data: {error}")
+    if errors:
+        st.info("💡 Make sure the ATS pipeline is running and views are created.")
     
     if df_latest is None or df_latest.empty:
         st.warning("⚠️ No data available. Ensure the ATS simulator is running and Kafka connector is configured.")
         return
     
+    # Plotly is only needed once there is something to chart
+    import plotly.express as px
+    import plotly.graph_objects as go
+    
+    # Resolve dataset availability once; the timelines below can rely on
+    # df_latest being non-empty
+    has_alerts = df_alerts is not None and not df_alerts.empty
+    has_stats = df_stats is not None and not df_stats.empty
+    has_trains = df_trains is not None and not df_trains.empty
+    
     # KPI Metrics
     st.header("📊 Key Performance Indicators")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_trains = df_trains['TRAIN_ID'].nunique() if df_trains is not None and not df_trains.empty else 0
+        total_trains = int(kpi_value(kpis, 'ACTIVE_TRAINS'))
         st.metric("Active Trains", total_trains, "Online")
     
     with col2:
-        avg_passengers = int(df_latest['PASSENGER_COUNT'].mean()) if not df_latest.empty else 0
+        avg_passengers = int(kpi_value(kpis, 'AVG_PASSENGER_COUNT'))
         st.metric("Avg Passengers", avg_passengers, "per train")
     
     with col3:
-        alert_count = len(df_alerts) if df_alerts is not None and not df_alerts.empty else 0
+        alert_count = len(df_alerts) if has_alerts else 0
         st.metric("Active Alerts", alert_count, "⚠️" if alert_count > 0 else "✅")
     
     with col4:
-        avg_power = round(df_latest['POWER_DRAW_KW'].mean(), 2) if not df_latest.empty else 0
+        avg_power = round(kpi_value(kpis, 'AVG_POWER_DRAW_KW'), 2)
         st.metric("Avg Power Draw", f"{avg_power} kW", "Current")
     
     # Alerts Section
     st.header("🚨 Active Alerts")
-    if df_alerts is not None and not df_alerts.empty:
-        for _, alert in df_alerts.head(5).iterrows():
-            alert_type = "critical" if alert['ALERT_TYPE'] == 'OVERCROWDING' else "warning"
-            icon = "🔴" if alert_type == "critical" else "🟡"
-            st.markdown(f"""
-                <div class="alert-box alert-{alert_type}">
-                    {icon} <strong>{alert['ALERT_TYPE']}</strong> - Train {alert['TRAIN_ID']} 
-                    at {alert['TIMESTAMP']}<br>
-                    Passengers: {alert['PASSENGER_COUNT']} | Power: {alert['POWER_DRAW_KW']} kW
-                </div>
-            """, unsafe_allow_html=True)
+    if has_alerts:
+        alerts = df_alerts.head(5)
+        critical = alerts['ALERT_TYPE'].eq('OVERCROWDING').to_numpy()
+        alerts = alerts.assign(
+            LEVEL=np.where(critical, 'critical', 'warning'),
+            ICON=np.where(critical, '🔴', '🟡')
+        )
+        # One markdown element for all cards instead of one per alert
+        alerts_html = "\n".join(
+            ALERT_TEMPLATE.format(**alert._asdict())
+            for alert in alerts.itertuples(index=False)
+        )
+        st.markdown(alerts_html, unsafe_allow_html=True)
     else:
         st.success("✅ No active alerts - All systems normal")
     
@@ -254,65 +395,78 @@ def main():
     
     with col1:
         st.subheader("Passenger Count Timeline")
-        if not df_latest.empty:
-            fig_passengers = px.line(
-                df_latest.sort_values('TIMESTAMP'),
-                x='TIMESTAMP',
-                y='PASSENGER_COUNT',
-                color='TRAIN_ID',
-                title='Passenger Count by Train',
-                labels={'PASSENGER_COUNT': 'Passengers', 'TIMESTAMP': 'Time'}
-            )
-            fig_passengers.update_layout(height=400)
-            st.plotly_chart(fig_passengers, use_container_width=True)
+        fig_passengers = px.line(
+            df_latest,
+            x='TIMESTAMP',
+            y='PASSENGER_COUNT',
+            color='TRAIN_ID',
+            title='Passenger Count by Train',
+            labels={'PASSENGER_COUNT': 'Passengers', 'TIMESTAMP': 'Time'},
+            render_mode='webgl'
+        )
+        fig_passengers.update_layout(height=400)
+        st.plotly_chart(fig_passengers, use_container_width=True)
     
     with col2:
         st.subheader("Power Draw Timeline")
-        if not df_latest.empty:
-            fig_power = px.line(
-                df_latest.sort_values('TIMESTAMP'),
-                x='TIMESTAMP',
-                y='POWER_DRAW_KW',
-                color='TRAIN_ID',
-                title='Power Consumption by Train',
-                labels={'POWER_DRAW_KW': 'Power (kW)', 'TIMESTAMP': 'Time'}
-            )
-            fig_power.add_hline(y=150, line_dash="dash", line_color="red", 
-                               annotation_text="Max Threshold")
-            fig_power.update_layout(height=400)
-            st.plotly_chart(fig_power, use_container_width=True)
+        fig_power = px.line(
+            df_latest,
+            x='TIMESTAMP',
+            y='POWER_DRAW_KW',
+            color='TRAIN_ID',
+            title='Power Consumption by Train',
+            labels={'POWER_DRAW_KW': 'Power (kW)', 'TIMESTAMP': 'Time'},
+            render_mode='webgl'
+        )
+        fig_power.add_hline(y=150, line_dash="dash", line_color="red", 
+                           annotation_text="Max Threshold")
+        fig_power.update_layout(height=400)
+        st.plotly_chart(fig_power, use_container_width=True)
     
     # Distribution Charts
     col3, col4 = st.columns(2)
     
     with col3:
         st.subheader("Passenger Distribution")
-        if not df_latest.empty:
-            fig_hist = px.histogram(
-                df_latest,
-                x='PASSENGER_COUNT',
-                nbins=30,
-                title='Passenger Count Distribution',
-                labels={'PASSENGER_COUNT': 'Passengers'}
-            )
-            fig_hist.update_layout(height=350)
-            st.plotly_chart(fig_hist, use_container_width=True)
+        readings, edges = passenger_histogram(df_latest)
+        bin_width = edges[1] - edges[0]
+        fig_hist = go.Figure(go.Bar(
+            x=edges[:-1] + bin_width / 2,
+            y=readings,
+            width=bin_width,
+            name='Readings'
+        ))
+        fig_hist.update_layout(
+            title='Passenger Count Distribution',
+            xaxis_title='Passengers',
+            yaxis_title='count',
+            bargap=0,
+            height=350
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
     
     with col4:
         st.subheader("Train Speed Distribution")
-        if not df_latest.empty:
-            fig_speed = px.box(
-                df_latest,
-                x='TRAIN_ID',
-                y='SPEED_KMH',
-                title='Speed Distribution by Train',
-                labels={'SPEED_KMH': 'Speed (km/h)', 'TRAIN_ID': 'Train ID'}
-            )
-            fig_speed.update_layout(height=350)
-            st.plotly_chart(fig_speed, use_container_width=True)
+        df_speed = speed_quartiles(df_latest)
+        fig_speed = go.Figure(go.Box(
+            x=df_speed.index,
+            lowerfence=df_speed[0],
+            q1=df_speed[0.25],
+            median=df_speed[0.5],
+            q3=df_speed[0.75],
+            upperfence=df_speed[1],
+            name='Speed'
+        ))
+        fig_speed.update_layout(
+            title='Speed Distribution by Train',
+            xaxis_title='Train ID',
+            yaxis_title='Speed (km/h)',
+            height=350
+        )
+        st.plotly_chart(fig_speed, use_container_width=True)
     
     # Hourly Statistics
-    if df_stats is not None and not df_stats.empty:
+    if has_stats:
         st.header("📅 Hourly Statistics")
         col5, col6 = st.columns(2)
         
@@ -358,20 +512,12 @@ def main():
     
     # Train Status Table
     st.header("🚂 Train Status Overview")
-    if df_trains is not None and not df_trains.empty:
-        # Format the dataframe
-        df_display = df_trains.copy()
-        df_display['STATUS'] = df_display.apply(
-            lambda row: '🔴 ALERT' if row['IS_OVERCROWDED'] or row['IS_HIGH_POWER_DRAW'] else '✅ OK',
-            axis=1
-        )
-        df_display = df_display[['TRAIN_ID', 'TIMESTAMP', 'PASSENGER_COUNT', 
-                                 'POWER_DRAW_KW', 'SPEED_KMH', 'STATUS']]
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
+    if has_trains:
+        st.dataframe(df_trains, use_container_width=True, hide_index=True)
     
     # Raw Data Explorer
     with st.expander("🔍 Raw Data Explorer"):
-        st.dataframe(df_latest.head(50), use_container_width=True, hide_index=True)
+        st.dataframe(df_latest.tail(50).iloc[::-1], use_container_width=True, hide_index=True)
     
     # Footer
     st.markdown("---")
@@ -380,12 +526,59 @@ def main():
         st.markdown(f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
     with col_footer2:
         st.markdown("*Powered by Snowflake ❄️*")
+
+@st.cache_resource(ttl=CONNECTION_CHECK_TTL_SECONDS, show_spinner=False)
+def check_connection():
+    """
+    Verify the Snowpark session and look up the current account.
     
-    # Auto-refresh
-    if auto_refresh:
-        import time
-        time.sleep(refresh_interval)
+    Memoized so reruns reuse the result instead of querying the warehouse
+    just to paint the sidebar status. Failures raise and are not cached.
+    
+    Returns:
+        str: Current Snowflake account
+    """
+    _session().sql("SELECT CURRENT_VERSION()").collect()
+    return _session().get_current_account()
+
+# Main Dashboard
+def main():
+    # Header with Snowflake Native badge
+    st.markdown('<div class="sis-badge">🌨️ Snowflake Native App</div>', unsafe_allow_html=True)
+    st.title("🚆 ATS Real-Time Monitoring Dashboard")
+    st.markdown("*Automatic Train Supervision System - Live Telemetry (Streamlit-in-Snowflake)*")
+    
+    # Sidebar
+    st.sidebar.header("⚙️ Dashboard Controls")
+    auto_refresh = st.sidebar.checkbox("Auto-refresh", value=True)
+    refresh_interval = st.sidebar.slider("Refresh interval (seconds)", 10, 60, 30)
+    # A few fixed sizes keep the cache keys and bound query results shared
+    # across sessions and refreshes
+    data_limit = st.sidebar.select_slider(
+        "Data points to display",
+        options=DATA_LIMIT_OPTIONS,
+        value=DEFAULT_DATA_LIMIT
+    )
+    
+    if st.sidebar.button("🔄 Refresh Now"):
+        st.cache_data.clear()
         st.rerun()
+    
+    # Status indicator
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 📡 Connection Status")
+    try:
+        account = check_connection()
+        st.sidebar.success("✅ Connected to Snowflake")
+        st.sidebar.info(f"**Session ID:** {account}")
+    except Exception as e:
+        st.sidebar.error(f"❌ Connection Failed: {e}")
+        return
+    
+    # Auto-refresh: the live panel reruns on its own fragment schedule
+    # instead of the whole script sleeping and calling st.rerun()
+    run_every = f"{refresh_interval}s" if auto_refresh else None
+    st.fragment(run_every=run_every)(render_dashboard)(data_limit)
 
 if __name__ == "__main__":
     main()
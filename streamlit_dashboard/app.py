@@ -3,16 +3,19 @@ ATS (Automatic Train Supervision) Real-Time Dashboard
 Streamlit application for visualizing train telemetry data from Snowflake
 """
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import snowflake.connector
 from snowflake.connector import DictCursor
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import numpy as np
+from datetime import datetime
 import os
-from dotenv import load_dotenv
 import time
+from dotenv import load_dotenv
 import logging
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 
 # Configure logging
@@ -27,8 +30,21 @@ load_dotenv()
 
 # Configuration constants
 MAX_DATA_POINTS = 500
-CACHE_TTL_SECONDS = 60
+DATA_LIMIT_OPTIONS = [50, 100, 200, 500]  # Canonical slider positions
+CACHE_TTL_SECONDS = 60  # Latest data, alerts and KPIs
+STATUS_CACHE_TTL_SECONDS = 30  # Per-train latest status
+STATS_CACHE_TTL_SECONDS = 600  # Hourly rollups change slowly
 QUERY_TIMEOUT_SECONDS = 30
+CONNECTION_POOL_SIZE = 5  # One connection per concurrently fetched dataset
+HISTOGRAM_BINS = 30  # Passenger distribution bins
+
+# Alert card markup, filled from one ATS_ALERTS row
+ALERT_TEMPLATE = (
+    '<div class="alert-box alert-{LEVEL}">'
+    '{ICON} <strong>{ALERT_TYPE}</strong> - Train {TRAIN_ID} at {TIMESTAMP}<br>'
+    'Passengers: {PASSENGER_COUNT} | Power: {POWER_DRAW_KW:.2f} kW'
+    '</div>'
+)
 
 # Page configuration
 st.set_page_config(
@@ -79,32 +95,105 @@ def validate_config():
         st.info("Please configure your .env file with Snowflake credentials")
         st.stop()
 
-@st.cache_resource(ttl=3600)  # Cache for 1 hour
-def init_snowflake_connection():
+class ConnectionPool:
+    """
+    Fixed-size pool of authenticated Snowflake connections.
+    
+    Connections are opened lazily up to the pool size and handed back
+    after each query, so reruns and concurrent Streamlit sessions reuse
+    warm, already-authenticated sockets instead of reconnecting.
+    """
+    
+    def __init__(self, size, **connect_kwargs):
+        self._connect_kwargs = connect_kwargs
+        self._idle = queue.LifoQueue(maxsize=size)
+        for _ in range(size):
+            self._idle.put(None)  # Placeholder for a not-yet-opened connection
+    
+    def _connect(self):
+        conn = snowflake.connector.connect(**self._connect_kwargs)
+        logger.info("Snowflake connection established successfully")
+        return conn
+    
+    @contextmanager
+    def connection(self, timeout=QUERY_TIMEOUT_SECONDS):
+        """
+        Borrow a connection from the pool.
+        
+        Args:
+            timeout: Seconds to wait for a free connection
+            
+        Yields:
+            snowflake.connector.connection: Open Snowflake connection
+        """
+        conn = self._idle.get(timeout=timeout)
+        try:
+            if conn is None or conn.is_closed():
+                conn = None
+                conn = self._connect()
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+@st.cache_resource
+def init_connection_pool(user, role, warehouse):
     """
-    Initialize Snowflake connection with connection pooling.
+    Initialize the Snowflake connection pool shared by all sessions.
+    
+    Cached per (user, role, warehouse). The first connection is opened
+    eagerly so bad credentials surface immediately; failures raise and
+    are therefore not cached.
     
     Returns:
-        snowflake.connector.connection: Active Snowflake connection
+        ConnectionPool: Pool of Snowflake connections
     """
     validate_config()
     
+    pool = ConnectionPool(
+        CONNECTION_POOL_SIZE,
+        account=os.getenv('SNOWFLAKE_ACCOUNT'),
+        user=user,
+        password=os.getenv('SNOWFLAKE_PASSWORD'),
+        warehouse=warehouse,
+        database=os.getenv('SNOWFLAKE_DATABASE'),
+        schema=os.getenv('SNOWFLAKE_SCHEMA'),
+        role=role,
+        client_session_keep_alive=True,
+        # Bind parameters server-side (qmark) instead of formatting them into
+        # the SQL, so values are never parsed as SQL and the statement text
+        # stays the same for every limit
+        paramstyle='qmark',
+        session_parameters={
+            'QUERY_TAG': 'ATS_DASHBOARD',
+            'STATEMENT_TIMEOUT_IN_SECONDS': QUERY_TIMEOUT_SECONDS
+        }
+    )
+    with pool.connection():
+        pass
+    return pool
+
+def connection_pool():
+    """
+    Return the connection pool for the configured user, role and warehouse.
+    
+    Returns:
+        ConnectionPool: Shared pool; raises if Snowflake is unreachable
+    """
+    return init_connection_pool(
+        os.getenv('SNOWFLAKE_USER'),
+        os.getenv('SNOWFLAKE_ROLE', 'PUBLIC'),
+        os.getenv('SNOWFLAKE_WAREHOUSE')
+    )
+
+def get_connection_pool():
+    """
+    Return the shared connection pool, reporting connection failures.
+    
+    Returns:
+        ConnectionPool: Shared pool, or None if Snowflake is unreachable
+    """
     try:
-        conn = snowflake.connector.connect(
-            account=os.getenv('SNOWFLAKE_ACCOUNT'),
-            user=os.getenv('SNOWFLAKE_USER'),
-            password=os.getenv('SNOWFLAKE_PASSWORD'),
-            warehouse=os.getenv('SNOWFLAKE_WAREHOUSE'),
-            database=os.getenv('SNOWFLAKE_DATABASE'),
-            schema=os.getenv('SNOWFLAKE_SCHEMA'),
-            role=os.getenv('SNOWFLAKE_ROLE', 'PUBLIC'),
-            session_parameters={
-                'QUERY_TAG': 'ATS_DASHBOARD',
-                'STATEMENT_TIMEOUT_IN_SECONDS': QUERY_TIMEOUT_SECONDS
-            }
-        )
-        logger.info("Snowflake connection established successfully")
-        return conn
+        return connection_pool()
     except Exception as e:
         logger.error(f"Failed to connect to Snowflake: {e}")
         st.error(f"❌ Failed to connect to Snowflake: {e}")
@@ -113,31 +202,32 @@ def init_snowflake_connection():
 @contextmanager
 def get_cursor():
     """
-    Context manager for database cursor with automatic cleanup.
+    Context manager for a cursor on a pooled connection, with automatic cleanup.
     
     Yields:
         cursor: Snowflake cursor object
     """
-    conn = init_snowflake_connection()
-    if not conn:
-        yield None
-        return
-    
-    cursor = None
-    try:
-        cursor = conn.cursor(DictCursor)
-        yield cursor
-    except Exception as e:
-        logger.error(f"Cursor error: {e}")
-        raise
-    finally:
-        if cursor:
-            cursor.close()
+    with connection_pool().connection() as conn:
+        cursor = None
+        try:
+            cursor = conn.cursor(DictCursor)
+            yield cursor
+        except Exception as e:
+            logger.error(f"Cursor error: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
 
-@st.cache_data(ttl=CACHE_TTL_SECONDS)
 def execute_query(query, params=None):
     """
-    Execute Snowflake query and return DataFrame with caching.
+    Execute Snowflake query and return DataFrame.
+    
+    Results are fetched as Arrow and converted to pandas in place. Caching
+    is applied by the get_* callers so each dataset can use a TTL matched
+    to how often its source view changes. Errors are logged and re-raised,
+    so failed queries are never cached and the caller decides where to
+    report them.
     
     Args:
         query: SQL query string
@@ -146,20 +236,31 @@ def execute_query(query, params=None):
     Returns:
         pd.DataFrame: Query results as pandas DataFrame
     """
-    with get_cursor() as cursor:
-        if not cursor:
-            return None
-        
-        try:
+    # Waiting for a pooled connection and reopening a stale one happen while
+    # the cursor is acquired, so they are logged here with the query errors
+    try:
+        with get_cursor() as cursor:
             cursor.execute(query, params)
-            df = cursor.fetch_pandas_all()
+            table = cursor.fetch_arrow_all()
+            if table is None:
+                # No rows: keep the column layout so callers can still index
+                columns = [col.name for col in cursor.description]
+                return pd.DataFrame(columns=columns)
+            
+            # Free Arrow buffers as columns are converted to keep peak memory
+            # near a single copy of the result
+            df = table.to_pandas(split_blocks=True, self_destruct=True)
+            del table
             logger.debug(f"Query returned {len(df)} rows")
             return df
-        except Exception as e:
-            logger.error(f"Query execution failed: {e}")
-            st.error(f"Query failed: {e}")
-            return None
+    except queue.Empty:
+        logger.error("Timed out waiting for a free Snowflake connection")
+        raise TimeoutError("no Snowflake connection became available") from None
+    except Exception as e:
+        logger.error(f"Query execution failed: {e}")
+        raise
 
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=8, show_spinner=False)
 def get_latest_data(limit=100):
     """
     Fetch latest telemetry data with limit.
@@ -168,30 +269,35 @@ def get_latest_data(limit=100):
         limit: Maximum number of records to fetch (default: 100)
         
     Returns:
-        pd.DataFrame: Latest telemetry data
+        pd.DataFrame: Latest telemetry readings used by the charts, oldest first
     """
     # Enforce maximum limit to prevent memory issues
     limit = min(limit, MAX_DATA_POINTS)
     
-    query = f"""
-    SELECT 
-        timestamp,
-        train_id,
-        passenger_count,
-        total_weight_tons,
-        power_draw_kw,
-        speed_kmh,
-        latitude,
-        longitude,
-        is_overcrowded,
-        is_high_power_draw
-    FROM ATS_TRANSFORMED
-    WHERE timestamp >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
-    ORDER BY timestamp DESC
-    LIMIT {limit}
+    # Take the most recent rows, then return them oldest first so the
+    # timelines can plot them without re-sorting
+    query = """
+    WITH latest AS (
+        SELECT 
+            timestamp,
+            train_id,
+            passenger_count,
+            power_draw_kw,
+            speed_kmh
+        FROM ATS_TRANSFORMED
+        -- timestamp is UTC wall time (TIMESTAMP_NTZ), so every window is
+        -- measured from SYSDATE() (UTC NTZ) rather than CURRENT_TIMESTAMP(),
+        -- which is in the session time zone
+        WHERE timestamp >= DATEADD(hour, -24, SYSDATE())
+        ORDER BY timestamp DESC
+        LIMIT ?
+    )
+    SELECT * FROM latest
+    ORDER BY timestamp ASC
     """
-    return execute_query(query)
+    return execute_query(query, (limit,))
 
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=8, show_spinner=False)
 def get_alerts():
     """
     Fetch recent active alerts (last 24 hours only).
@@ -205,22 +311,29 @@ def get_alerts():
         train_id,
         alert_type,
         passenger_count,
-        power_draw_kw,
-        total_weight_tons
+        power_draw_kw
     FROM ATS_ALERTS
-    WHERE timestamp >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
+    WHERE timestamp >= DATEADD(hour, -24, SYSDATE())
     ORDER BY timestamp DESC
     LIMIT 50
     """
     return execute_query(query)
 
+@st.cache_data(persist="disk", max_entries=1, show_spinner=False)
 def get_hourly_stats():
     """
     Fetch hourly statistics for the last 24 hours.
     
+    Persisted to disk so the rollup survives app restarts. Streamlit ignores
+    ttl for persisted caches, so the result is tagged with the interval it
+    was fetched in; use load_hourly_stats() rather than calling this
+    directly. Query errors raise, so a failed fetch is never persisted.
+    
     Returns:
-        pd.DataFrame: Hourly aggregated statistics
+        tuple: (index of the STATS_CACHE_TTL_SECONDS interval it was
+        fetched in, hourly aggregated statistics DataFrame)
     """
+    window = int(time.time() // STATS_CACHE_TTL_SECONDS)
     query = """
     SELECT 
         hour,
@@ -233,103 +346,254 @@ def get_hourly_stats():
         overcrowding_incidents,
         high_power_incidents
     FROM ATS_HOURLY_STATS
-    WHERE hour >= DATEADD(hour, -24, CURRENT_TIMESTAMP())
+    -- Compare the grouping key with an hour boundary so the filter can be pushed
+    -- below the view's GROUP BY and prunes ATS_TRANSFORMED by timestamp
+    WHERE hour >= DATE_TRUNC('hour', DATEADD(hour, -24, SYSDATE()))
     ORDER BY hour DESC
     LIMIT 24
     """
-    return execute_query(query)
+    return window, execute_query(query)
 
+def load_hourly_stats():
+    """
+    Return the hourly statistics for the current cache window.
+    
+    Returns:
+        pd.DataFrame: Hourly aggregated statistics
+    """
+    window = int(time.time() // STATS_CACHE_TTL_SECONDS)
+    fetched, df = get_hourly_stats()
+    if fetched < window:
+        # Persisted entries never expire, so replace the whole cache once
+        # its window has passed
+        get_hourly_stats.clear()
+        _, df = get_hourly_stats()
+    return df
+
+@st.cache_data(ttl=STATUS_CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
 def get_train_status():
     """
     Fetch latest status for each train (active in last hour).
     
     Returns:
-        pd.DataFrame: Current status of all active trains
+        pd.DataFrame: Current status of all active trains, ready to display
     """
     query = """
     SELECT 
         train_id,
         timestamp,
         passenger_count,
-        total_weight_tons,
         power_draw_kw,
         speed_kmh,
-        is_overcrowded,
-        is_high_power_draw
+        CASE WHEN is_overcrowded OR is_high_power_draw
+             THEN '🔴 ALERT' ELSE '✅ OK' END AS status
     FROM ATS_LATEST_STATUS
-    WHERE timestamp >= DATEADD(hour, -1, CURRENT_TIMESTAMP())
+    WHERE timestamp >= DATEADD(hour, -1, SYSDATE())
     ORDER BY train_id
     """
     return execute_query(query)
 
-# Main Dashboard
-def main():
-    st.title("🚆 ATS Real-Time Monitoring Dashboard")
-    st.markdown("*Automatic Train Supervision System - Live Telemetry*")
+@st.cache_data(ttl=CACHE_TTL_SECONDS, max_entries=4, show_spinner=False)
+def get_kpis():
+    """
+    Fetch last-hour KPI aggregates, computed in Snowflake.
     
-    # Sidebar
-    st.sidebar.header("⚙️ Dashboard Controls")
-    auto_refresh = st.sidebar.checkbox("Auto-refresh", value=True)
-    refresh_interval = st.sidebar.slider("Refresh interval (seconds)", 10, 60, 30)
-    data_limit = st.sidebar.slider("Data points to display", 50, 500, 100)
+    Returns:
+        dict: AVG_PASSENGER_COUNT, AVG_POWER_DRAW_KW and ACTIVE_TRAINS
+    """
+    query = """
+    SELECT 
+        AVG(passenger_count) AS avg_passenger_count,
+        AVG(power_draw_kw) AS avg_power_draw_kw,
+        COUNT(DISTINCT train_id) AS active_trains
+    FROM ATS_TRANSFORMED
+    WHERE timestamp >= DATEADD(hour, -1, SYSDATE())
+    """
+    df = execute_query(query)
+    if df.empty:
+        return None
+    return df.iloc[0].to_dict()
+
+def passenger_histogram(df):
+    """
+    Bin the charted readings' passenger counts.
     
-    if st.sidebar.button("🔄 Refresh Now"):
-        st.rerun()
+    Uses HISTOGRAM_BINS equal-width bins from 0 up to the busiest reading,
+    so the bins cover the counts actually charted.
     
-    # Status indicator
-    st.sidebar.markdown("---")
-    st.sidebar.markdown("### 📡 Connection Status")
-    conn = init_snowflake_connection()
-    if conn:
-        st.sidebar.success("✅ Connected to Snowflake")
-    else:
-        st.sidebar.error("❌ Connection Failed")
-        return
+    Args:
+        df: Non-empty telemetry readings from get_latest_data
+        
+    Returns:
+        tuple: (readings per bin, bin edges) as numpy arrays
+    """
+    counts = df['PASSENGER_COUNT'].to_numpy()
+    return np.histogram(counts, bins=HISTOGRAM_BINS, range=(0, max(counts.max(), 1)))
+
+def speed_quartiles(df):
+    """
+    Summarize the charted readings' speeds per train.
+    
+    Args:
+        df: Telemetry readings from get_latest_data
+        
+    Returns:
+        pd.DataFrame: One row per TRAIN_ID with the 0, 0.25, 0.5, 0.75 and 1
+        speed quantiles as columns
+    """
+    return df.groupby('TRAIN_ID')['SPEED_KMH'].quantile([0, 0.25, 0.5, 0.75, 1]).unstack()
+
+def kpi_value(kpis, key):
+    """Return a KPI aggregate, treating missing/NULL values as 0"""
+    value = kpis.get(key) if kpis else None
+    return 0 if pd.isna(value) else value
+
+def fetch_concurrently(fetchers):
+    """
+    Run independent dashboard queries in parallel threads.
+    
+    Each query pays its own network and warehouse-scheduling round-trip,
+    so issuing them together costs roughly the slowest one instead of
+    their sum. Worker threads share the caller's script context so
+    Streamlit caching works inside them, but they never render anything:
+    errors are handed back so the caller reports them in its own container.
+    
+    Args:
+        fetchers: Mapping of name to a zero-argument fetch function
+        
+    Returns:
+        tuple: (results, errors) mappings of name to that function's result
+        (None if it failed) and to the exception it raised
+    """
+    ctx = get_script_run_ctx()
+    
+    def run(fetch):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fetch()
+    
+    results, errors = {}, {}
+    with ThreadPoolExecutor(max_workers=len(fetchers)) as executor:
+        futures = {name: executor.submit(run, fetch) for name, fetch in fetchers.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                results[name] = None
+                errors[name] = e
+    return results, errors
+
+def build_timeline(df, y, title, y_label):
+    """
+    Build a per-train timeline drawn with WebGL traces.
+    
+    At most MAX_DATA_POINTS rows are charted, so every point is sent to the
+    browser as is; WebGL keeps panning and hovering smooth.
+    
+    Args:
+        df: Telemetry sorted by TIMESTAMP
+        y: Column to plot against time
+        title: Chart title
+        y_label: Y-axis label
+        
+    Returns:
+        go.Figure: WebGL line chart with one trace per train
+    """
+    import plotly.graph_objects as go
+    
+    fig = go.Figure()
+    for train_id, group in df.groupby('TRAIN_ID', sort=True):
+        fig.add_trace(go.Scattergl(
+            x=group['TIMESTAMP'],
+            y=group[y],
+            name=str(train_id),
+            mode='lines'
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Time',
+        yaxis_title=y_label,
+        legend_title_text='TRAIN_ID'
+    )
+    return fig
+
+def render_dashboard(data_limit):
+    """
+    Fetch the dashboard datasets and render every main-area panel.
     
+    Runs as a Streamlit fragment so auto-refresh re-executes only this
+    panel, not the sidebar, header and connection check.
+    
+    Args:
+        data_limit: Number of telemetry points to chart
+    """
     # Fetch data
     with st.spinner("Loading data from Snowflake..."):
-        df_latest = get_latest_data(data_limit)
-        df_alerts = get_alerts()
-        df_stats = get_hourly_stats()
-        df_trains = get_train_status()
+        data, errors = fetch_concurrently({
+            'latest': lambda: get_latest_data(data_limit),
+            'alerts': get_alerts,
+            'stats': load_hourly_stats,
+            'trains': get_train_status,
+            'kpis': get_kpis,
+        })
+        df_latest = data['latest']
+        df_alerts = data['alerts']
+        df_stats = data['stats']
+        df_trains = data['trains']
+        kpis = data['kpis']
+    
+    # Report failures from the script thread so they render in this fragment;
+    # panels whose query succeeded are still shown
+    for name, error in errors.items():
+        st.error(f"Query failed ({name}): {error}")
     
     if df_latest is None or df_latest.empty:
         st.warning("⚠️ No data available. Ensure the ATS simulator is running and Kafka connector is configured.")
         return
     
+    # Plotly is only needed once there is something to chart
+    import plotly.graph_objects as go
+    
+    # Resolve dataset availability once; the timelines below can rely on
+    # df_latest being non-empty
+    has_alerts = df_alerts is not None and not df_alerts.empty
+    has_stats = df_stats is not None and not df_stats.empty
+    has_trains = df_trains is not None and not df_trains.empty
+    
     # KPI Metrics
     st.header("📊 Key Performance Indicators")
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_trains = df_trains['TRAIN_ID'].nunique() if df_trains is not None else 0
+        total_trains = int(kpi_value(kpis, 'ACTIVE_TRAINS'))
         st.metric("Active Trains", total_trains, "Online")
     
     with col2:
-        avg_passengers = int(df_latest['PASSENGER_COUNT'].mean()) if not df_latest.empty else 0
+        avg_passengers = int(kpi_value(kpis, 'AVG_PASSENGER_COUNT'))
         st.metric("Avg Passengers", avg_passengers, "per train")
     
     with col3:
-        alert_count = len(df_alerts) if df_alerts is not None and not df_alerts.empty else 0
+        alert_count = len(df_alerts) if has_alerts else 0
         st.metric("Active Alerts", alert_count, "⚠️" if alert_count > 0 else "✅")
     
     with col4:
-        avg_power = round(df_latest['POWER_DRAW_KW'].mean(), 2) if not df_latest.empty else 0
+        avg_power = round(kpi_value(kpis, 'AVG_POWER_DRAW_KW'), 2)
         st.metric("Avg Power Draw", f"{avg_power} kW", "Current")
     
     # Alerts Section
     st.header("🚨 Active Alerts")
-    if df_alerts is not None and not df_alerts.empty:
-        for _, alert in df_alerts.head(5).iterrows():
-            alert_type = "critical" if alert['ALERT_TYPE'] == 'OVERCROWDING' else "warning"
-            icon = "🔴" if alert_type == "critical" else "🟡"
-            st.markdown(f"""
-                <div class="alert-box alert-{alert_type}">
-                    {icon} <strong>{alert['ALERT_TYPE']}</strong> - Train {alert['TRAIN_ID']} 
-                    at {alert['TIMESTAMP']}<br>
-                    Passengers: {alert['PASSENGER_COUNT']} | Power: {alert['POWER_DRAW_KW']} kW
-                </div>
-            """, unsafe_allow_html=True)
+    if has_alerts:
+        alerts = df_alerts.head(5)
+        critical = alerts['ALERT_TYPE'].eq('OVERCROWDING').to_numpy()
+        alerts = alerts.assign(
+            LEVEL=np.where(critical, 'critical', 'warning'),
+            ICON=np.where(critical, '🔴', '🟡')
+        )
+        # One markdown element for all cards instead of one per alert
+        alerts_html = "\n".join(
+            ALERT_TEMPLATE.format(**alert._asdict())
+            for alert in alerts.itertuples(index=False)
+        )
+        st.markdown(alerts_html, unsafe_allow_html=True)
     else:
         st.success("✅ No active alerts - All systems normal")
     
@@ -341,65 +605,72 @@ def main():
     
     with col1:
         st.subheader("Passenger Count Timeline")
-        if not df_latest.empty:
-            fig_passengers = px.line(
-                df_latest.sort_values('TIMESTAMP'),
-                x='TIMESTAMP',
-                y='PASSENGER_COUNT',
-                color='TRAIN_ID',
-                title='Passenger Count by Train',
-                labels={'PASSENGER_COUNT': 'Passengers', 'TIMESTAMP': 'Time'}
-            )
-            fig_passengers.update_layout(height=400)
-            st.plotly_chart(fig_passengers, use_container_width=True)
+        fig_passengers = build_timeline(
+            df_latest,
+            'PASSENGER_COUNT',
+            'Passenger Count by Train',
+            'Passengers'
+        )
+        fig_passengers.update_layout(height=400)
+        st.plotly_chart(fig_passengers, use_container_width=True)
     
     with col2:
         st.subheader("Power Draw Timeline")
-        if not df_latest.empty:
-            fig_power = px.line(
-                df_latest.sort_values('TIMESTAMP'),
-                x='TIMESTAMP',
-                y='POWER_DRAW_KW',
-                color='TRAIN_ID',
-                title='Power Consumption by Train',
-                labels={'POWER_DRAW_KW': 'Power (kW)', 'TIMESTAMP': 'Time'}
-            )
-            fig_power.add_hline(y=150, line_dash="dash", line_color="red", 
-                               annotation_text="Max Threshold")
-            fig_power.update_layout(height=400)
-            st.plotly_chart(fig_power, use_container_width=True)
+        fig_power = build_timeline(
+            df_latest,
+            'POWER_DRAW_KW',
+            'Power Consumption by Train',
+            'Power (kW)'
+        )
+        fig_power.add_hline(y=150, line_dash="dash", line_color="red", 
+                           annotation_text="Max Threshold")
+        fig_power.update_layout(height=400)
+        st.plotly_chart(fig_power, use_container_width=True)
     
     # Distribution Charts
     col3, col4 = st.columns(2)
     
     with col3:
         st.subheader("Passenger Distribution")
-        if not df_latest.empty:
-            fig_hist = px.histogram(
-                df_latest,
-                x='PASSENGER_COUNT',
-                nbins=30,
-                title='Passenger Count Distribution',
-                labels={'PASSENGER_COUNT': 'Passengers'}
-            )
-            fig_hist.update_layout(height=350)
-            st.plotly_chart(fig_hist, use_container_width=True)
+        readings, edges = passenger_histogram(df_latest)
+        bin_width = edges[1] - edges[0]
+        fig_hist = go.Figure(go.Bar(
+            x=edges[:-1] + bin_width / 2,
+            y=readings,
+            width=bin_width,
+            name='Readings'
+        ))
+        fig_hist.update_layout(
+            title='Passenger Count Distribution',
+            xaxis_title='Passengers',
+            yaxis_title='count',
+            bargap=0,
+            height=350
+        )
+        st.plotly_chart(fig_hist, use_container_width=True)
     
     with col4:
         st.subheader("Train Speed Distribution")
-        if not df_latest.empty:
-            fig_speed = px.box(
-                df_latest,
-                x='TRAIN_ID',
-                y='SPEED_KMH',
-                title='Speed Distribution by Train',
-                labels={'SPEED_KMH': 'Speed (km/h)', 'TRAIN_ID': 'Train ID'}
-            )
-            fig_speed.update_layout(height=350)
-            st.plotly_chart(fig_speed, use_container_width=True)
+        df_speed = speed_quartiles(df_latest)
+        fig_speed = go.Figure(go.Box(
+            x=df_speed.index,
+            lowerfence=df_speed[0],
+            q1=df_speed[0.25],
+            median=df_speed[0.5],
+            q3=df_speed[0.75],
+            upperfence=df_speed[1],
+            name='Speed'
+        ))
+        fig_speed.update_layout(
+            title='Speed Distribution by Train',
+            xaxis_title='Train ID',
+            yaxis_title='Speed (km/h)',
+            height=350
+        )
+        st.plotly_chart(fig_speed, use_container_width=True)
     
     # Hourly Statistics
-    if df_stats is not None and not df_stats.empty:
+    if has_stats:
         st.header("📅 Hourly Statistics")
         col5, col6 = st.columns(2)
         
@@ -445,29 +716,51 @@ def main():
     
     # Train Status Table
     st.header("🚂 Train Status Overview")
-    if df_trains is not None and not df_trains.empty:
-        # Format the dataframe
-        df_display = df_trains.copy()
-        df_display['STATUS'] = df_display.apply(
-            lambda row: '🔴 ALERT' if row['IS_OVERCROWDED'] or row['IS_HIGH_POWER_DRAW'] else '✅ OK',
-            axis=1
-        )
-        df_display = df_display[['TRAIN_ID', 'TIMESTAMP', 'PASSENGER_COUNT', 
-                                 'POWER_DRAW_KW', 'SPEED_KMH', 'STATUS']]
-        st.dataframe(df_display, use_container_width=True, hide_index=True)
+    if has_trains:
+        st.dataframe(df_trains, use_container_width=True, hide_index=True)
     
     # Raw Data Explorer
     with st.expander("🔍 Raw Data Explorer"):
-        st.dataframe(df_latest.head(50), use_container_width=True, hide_index=True)
+        st.dataframe(df_latest.tail(50).iloc[::-1], use_container_width=True, hide_index=True)
     
     # Footer
     st.markdown("---")
     st.markdown(f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+
+# Main Dashboard
+def main():
+    st.title("🚆 ATS Real-Time Monitoring Dashboard")
+    st.markdown("*Automatic Train Supervision System - Live Telemetry*")
+    
+    # Sidebar
+    st.sidebar.header("⚙️ Dashboard Controls")
+    auto_refresh = st.sidebar.checkbox("Auto-refresh", value=True)
+    refresh_interval = st.sidebar.slider("Refresh interval (seconds)", 10, 60, 30)
+    # A few fixed sizes keep the cache keys and bound query results shared
+    # across sessions and refreshes
+    data_limit = st.sidebar.select_slider(
+        "Data points to display",
+        options=DATA_LIMIT_OPTIONS,
+        value=100
+    )
     
-    # Auto-refresh
-    if auto_refresh:
-        time.sleep(refresh_interval)
+    if st.sidebar.button("🔄 Refresh Now"):
         st.rerun()
+    
+    # Status indicator
+    st.sidebar.markdown("---")
+    st.sidebar.markdown("### 📡 Connection Status")
+    pool = get_connection_pool()
+    if pool:
+        st.sidebar.success("✅ Connected to Snowflake")
+    else:
+        st.sidebar.error("❌ Connection Failed")
+        return
+    
+    # Auto-refresh: the live panel reruns on its own fragment schedule
+    # instead of the whole script sleeping and calling st.rerun()
+    run_every = f"{refresh_interval}s" if auto_refresh else None
+    st.fragment(run_every=run_every)(render_dashboard)(data_limit)
 
 if __name__ == "__main__":
     main()
@@ -3,12 +3,80 @@
 ATS Pipeline Testing Script
 Verifies the entire ATS pipeline is working correctly
 """
+import argparse
+import asyncio
+import array
+import contextlib
+import functools
+import heapq
+import http.client
+import io
+import os
+import re
+import shutil
+import signal
 import subprocess
 import sys
+import tempfile
+import threading
 import time
+from enum import IntEnum
 from pathlib import Path
+from urllib.parse import urlsplit
 import json
 
+# The optional clients are imported on first use, so --help and runs that
+# fail before reaching them skip their import cost
+@functools.lru_cache(maxsize=None)
+def kafka_client():
+    """
+    Import confluent-kafka once
+    
+    Returns:
+        The confluent_kafka module, or None when it is not installed and the
+        checks fall back to the CLI tools inside the kafka container
+    """
+    try:
+        import confluent_kafka.admin
+    except ImportError:
+        return None
+    return confluent_kafka
+
+@functools.lru_cache(maxsize=None)
+def docker_sdk():
+    """
+    Import the Docker SDK once
+    
+    Returns:
+        The docker module, or None when it is not installed and the checks
+        shell out to the docker CLI
+    """
+    try:
+        import docker
+    except ImportError:
+        return None
+    return docker
+
+# Kafka listener advertised to the host (PLAINTEXT_HOST in docker-compose.yml);
+# librdkafka logging is silenced because failures are reported by the checks
+KAFKA_CLIENT_CONFIG = {"bootstrap.servers": "localhost:9093", "log_level": 0}
+KAFKA_TOPIC = "ats_telemetry"
+KAFKA_TIMEOUT_SECONDS = 2
+KAFKA_POLL_INTERVAL_SECONDS = 0.5
+
+# Results are reused by runs started shortly afterwards; failures expire
+# sooner so a fix shows up on the next run
+_CACHE_PATH = Path(tempfile.gettempdir()) / "ats_pipeline_tests.json"
+CACHE_TTL_PASS_SECONDS = 27
+CACHE_TTL_FAIL_SECONDS = 9
+
+# Checks taking longer than this are highlighted in the report
+SLOW_PROBE_MS = 3000
+
+# HTTP probes give up on a port that does not accept a TCP connection within
+# this time, before any request is sent
+TCP_CONNECT_TIMEOUT_SECONDS = 2
+
 class Colors:
     CYAN = '\033[96m'
     GREEN = '\033[92m'
@@ -19,146 +87,483 @@ class Colors:
     WHITE = '\033[97m'
     RESET = '\033[0m'
 
+class Status(IntEnum):
+    FAIL = 0
+    PASS = 1
+    ERROR = 2
+    SKIP = 3
+
+# One entry per check, kept as parallel arrays (names, one status byte,
+# a float32 duration and the failure message)
 class TestResults:
     def __init__(self):
-        self.passed = 0
-        self.failed = 0
-        self.total = 0
+        self.names = []
+        self.status = array.array('B')
+        self.duration_ms = array.array('f')
+        self.errors = []
+    
+    @property
+    def total(self):
+        return len(self.status)
+    
+    @property
+    def passed(self):
+        return self.status.count(Status.PASS)
+    
+    @property
+    def failed(self):
+        return self.total - self.passed
     
-    def add_pass(self):
-        self.total += 1
-        self.passed += 1
+    def _add(self, name, status, duration_ms, error):
+        self.names.append(name)
+        self.status.append(status)
+        self.duration_ms.append(duration_ms)
+        self.errors.append(error)
     
-    def add_fail(self):
-        self.total += 1
-        self.failed += 1
+    def add_pass(self, name, duration_ms=0.0):
+        self._add(name, Status.PASS, duration_ms, "")
+    
+    def add_fail(self, name, duration_ms=0.0, error="", status=Status.FAIL):
+        self._add(name, status, duration_ms, error)
+    
+    def to_json(self):
+        """Serialize all results as one JSON document of parallel lists"""
+        return json.dumps({
+            "names": self.names,
+            "status": [Status(code).name for code in self.status],
+            "duration_ms": [round(ms, 1) for ms in self.duration_ms],
+            "errors": self.errors,
+        })
     
     def pass_rate(self):
         if self.total == 0:
             return 0
         return round((self.passed / self.total) * 100, 1)
 
+# The report is assembled in memory and written to stdout in one go
+_RESET = Colors.RESET
+_BUF = io.StringIO()
+_write = _BUF.write
+
+# Section separators
+_DASHES = "-" * 80
+_EQUALS = "=" * 80
+
 def print_color(message, color, newline=True):
     """Print colored message"""
-    end = '\n' if newline else ''
-    print(f"{color}{message}{Colors.RESET}", end=end)
+    _write(color)
+    _write(message)
+    _write(_RESET)
+    if newline:
+        _write("\n")
 
-def run_command(command, check=True, timeout=10):
-    """Run shell command and return result"""
+def flush_output():
+    """Write the buffered report to stdout and start a new buffer"""
+    sys.stdout.write(_BUF.getvalue())
+    sys.stdout.flush()
+    _BUF.seek(0)
+    _BUF.truncate()
+
+@functools.lru_cache(maxsize=None)
+def program_path(name):
+    """Resolve a program on PATH once; None leaves the lookup to exec"""
+    return shutil.which(name)
+
+async def spawn(command, stderr):
+    """
+    Start command with its stdout piped
+    
+    CPython starts the child with posix_spawn (vfork) instead of fork+exec
+    only when the executable is a full path, descriptors are not closed and
+    no session, preexec or cwd options are given.
+    
+    Args:
+        command: Command to run as an argv list, without a shell
+        stderr: Where the child's stderr goes
+        
+    Returns:
+        asyncio.subprocess.Process for the started command
+    """
+    # Python opens its descriptors non-inheritable, so the child has
+    # nothing to close and can be started without the fd sweep
+    return await asyncio.create_subprocess_exec(
+        *command,
+        executable=program_path(command[0]),
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=stderr,
+        close_fds=False
+    )
+
+async def stop(proc, timeout=5):
+    """
+    Kill a started command and wait a bounded time for it to be reaped
+    
+    Popen.kill() polls before signalling and can reap a child that has just
+    exited, which asyncio's child watcher then reports as an unknown pid.
+    On POSIX the signal is sent to the pid directly instead; the unreaped
+    child keeps its pid until the watcher collects it.
+    
+    Args:
+        proc: asyncio.subprocess.Process to stop
+        timeout: Seconds to wait for its exit to be reported
+    """
+    if proc.returncode is None:
+        if sys.platform == "win32":
+            proc.kill()
+        else:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(proc.pid, signal.SIGKILL)
+    with contextlib.suppress(asyncio.TimeoutError):
+        await asyncio.wait_for(proc.wait(), timeout)
+
+async def run_command(command, check=True, timeout=10):
+    """Run command (an argv list, no shell) and return result"""
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            check=check,
-            capture_output=True,
-            text=True,
-            timeout=timeout
-        )
-        return result.stdout.strip()
-    except subprocess.TimeoutExpired:
+        proc = await spawn(command, subprocess.PIPE)
+    except Exception:
         return None
-    except subprocess.CalledProcessError:
+    
+    try:
+        stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await stop(proc)
         return None
-    except Exception:
+    except asyncio.CancelledError:
+        # Dependent check abandoned because a prerequisite failed
+        await stop(proc)
+        raise
+    
+    if check and proc.returncode != 0:
         return None
+    return stdout.decode(errors='replace').strip()
 
-def test_component(name, test_func, success_msg, failure_msg):
-    """Test a component and print result"""
-    print_color(f"Testing: {name}...", Colors.YELLOW, newline=False)
+async def run_command_contains(command, needle, timeout=10):
+    """
+    Run command and report whether a line of its output contains needle.
     
+    Output is scanned line by line as it arrives and the command is killed at
+    the first match, instead of buffering and decoding everything it prints.
+    
+    Args:
+        command: Command to run as an argv list, without a shell
+        needle: Text to look for; empty matches any non-blank line
+        timeout: Seconds to wait for a match
+        
+    Returns:
+        bool: True if a matching line was seen before the command ended
+    """
     try:
-        result = test_func()
-        if result:
-            print_color(" ✅ PASS", Colors.GREEN)
-            print_color(f"  → {success_msg}", Colors.GRAY)
-            return True
-        else:
-            print_color(" ❌ FAIL", Colors.RED)
-            print_color(f"  → {failure_msg}", Colors.GRAY)
-            return False
+        proc = await spawn(command, subprocess.DEVNULL)
+    except Exception:
+        return False
+    
+    needle = needle.encode()
+    
+    async def scan():
+        async for line in proc.stdout:
+            if needle in line and line.strip():
+                return True
+        return False
+    
+    try:
+        return await asyncio.wait_for(scan(), timeout)
+    except asyncio.TimeoutError:
+        return False
+    finally:
+        await stop(proc)
+
+async def test_component(name, test_func, success_msg, failure_msg):
+    """Run a component test and return its outcome for printing"""
+    start = time.monotonic_ns()
+    try:
+        status, message = ("PASS", success_msg) if await test_func() else ("FAIL", failure_msg)
     except Exception as e:
-        print_color(" ❌ ERROR", Colors.RED)
-        print_color(f"  → {str(e)}", Colors.GRAY)
+        status, message = "ERROR", str(e)
+    return name, status, message, False, (time.monotonic_ns() - start) / 1e6
+
+async def cached_component(name, status, message):
+    """Return an outcome read from the result cache"""
+    return name, status, message, True, 0.0
+
+def print_component(outcome):
+    """Print a component test result"""
+    name, status, message, cached, duration_ms = outcome
+    print_color(f"Testing: {name}...", Colors.YELLOW, newline=False)
+    
+    if cached:
+        color = Colors.GREEN if status == "PASS" else Colors.RED
+        print_color(f" ⏩ CACHED {status}", color)
+    elif status == "PASS":
+        print_color(" ✅ PASS", Colors.GREEN)
+    elif status == "SKIP":
+        print_color(" ⏭️  SKIP", Colors.YELLOW)
+    else:
+        print_color(f" ❌ {status}", Colors.RED)
+    if duration_ms > SLOW_PROBE_MS:
+        print_color(f"  ⏱️  slow: took {duration_ms / 1000:.1f}s", Colors.YELLOW)
+    print_color(f"  → {message}", Colors.GRAY)
+
+# Probe calls currently running, by key; concurrent callers of the same
+# probe await one shared task instead of repeating the query
+_inflight = {}
+
+def singleflight(key):
+    """
+    Share one in-flight call of a no-argument coroutine function
+    
+    Args:
+        key: Name under which the running call is registered
+        
+    Returns:
+        Decorator whose wrapper joins the running call or starts a new one
+    """
+    def decorator(func):
+        def forget(task):
+            del _inflight[key]
+            # Mark a failure as seen when every caller was cancelled
+            if not task.cancelled():
+                task.exception()
+        
+        @functools.wraps(func)
+        async def wrapper():
+            if key not in _inflight:
+                task = asyncio.ensure_future(func())
+                task.add_done_callback(forget)
+                _inflight[key] = task
+            # Shield the shared call so a cancelled caller does not cancel
+            # it for the others
+            return await asyncio.shield(_inflight[key])
+        return wrapper
+    return decorator
+
+# Docker SDK client shared by all checks; created under a lock because the
+# first callers race in worker threads
+_docker_client = None
+_docker_client_lock = threading.Lock()
+
+def docker_client():
+    """Return the shared Docker SDK client, creating it on first use"""
+    global _docker_client
+    with _docker_client_lock:
+        if _docker_client is None:
+            _docker_client = docker_sdk().from_env()
+        return _docker_client
+
+def ping_docker():
+    """Ping the Docker daemon over the SDK connection (blocking)"""
+    try:
+        return docker_client().ping()
+    except Exception:
         return False
 
-def test_docker():
+@functools.lru_cache(maxsize=None)
+def compose_project():
+    """Return the docker-compose project name, resolved as the CLI does"""
+    name = os.environ.get("COMPOSE_PROJECT_NAME") or Path.cwd().name
+    return re.sub(r"[^a-z0-9_-]", "", name.lower())
+
+def list_running_containers():
+    """Return compose service names of running containers via the SDK (blocking)"""
+    # Low-level listing: one request, no per-container inspect. The project
+    # label keeps same-named services of other compose projects out, like
+    # docker-compose ps does
+    containers = docker_client().api.containers(
+        filters={
+            "status": "running",
+            "label": ["com.docker.compose.service",
+                      f"com.docker.compose.project={compose_project()}"]
+        }
+    )
+    return {c["Labels"]["com.docker.compose.service"] for c in containers}
+
+@singleflight("docker_info")
+async def test_docker():
     """Test if Docker is running"""
-    result = run_command("docker info", check=False)
+    if docker_sdk() is not None:
+        return await asyncio.to_thread(ping_docker)
+    
+    # docker info exits non-zero when the daemon is unreachable
+    result = await run_command(["docker", "info"])
     return result is not None
 
-def test_env_file():
-    """Test if .env file exists"""
+@functools.lru_cache(maxsize=None)
+def env_file_exists():
+    """Check for the .env file once; later callers reuse the result"""
     return Path(".env").exists()
 
-def test_docker_service(service_name):
+async def test_env_file():
+    """Test if .env file exists"""
+    return env_file_exists()
+
+# Every service check is answered by a single Docker query
+@singleflight("compose_ps")
+async def list_running_services():
+    """Return the names of running docker-compose services"""
+    if docker_sdk() is not None:
+        return await asyncio.to_thread(list_running_containers)
+    
+    result = await run_command(["docker-compose", "ps", "--services", "--filter", "status=running"])
+    return set(result.split()) if result else set()
+
+async def test_docker_service(service_name):
     """Test if a Docker service is running"""
-    result = run_command(f"docker-compose ps -q {service_name}", check=False)
-    return result is not None and len(result) > 0
+    return service_name in await list_running_services()
+
+# One keep-alive connection (and lock) per host, shared by all HTTP probes
+_http_connections = {}
+_http_connections_lock = threading.Lock()
+
+def http_get(url, timeout=5):
+    """
+    Fetch a URL over a reused keep-alive connection and return the body (blocking)
+    
+    A new connection is opened with a bare TCP connect bounded by
+    TCP_CONNECT_TIMEOUT_SECONDS, so a service that is down fails fast and no
+    request is sent; once connected, timeout applies to the response.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname, parts.port or 80)
+    
+    with _http_connections_lock:
+        if host not in _http_connections:
+            _http_connections[host] = (
+                http.client.HTTPConnection(*host, timeout=TCP_CONNECT_TIMEOUT_SECONDS),
+                threading.Lock()
+            )
+        conn, lock = _http_connections[host]
+    
+    with lock:
+        try:
+            if conn.sock is None:
+                conn.connect()
+            conn.sock.settimeout(timeout)
+            conn.request("GET", parts.path or "/")
+            response = conn.getresponse()
+            body = response.read()
+        except Exception:
+            # Drop the broken socket; the next request reconnects
+            conn.close()
+            raise
+    
+    if response.status >= 400:
+        raise http.client.HTTPException(f"{url} returned HTTP {response.status}")
+    return body
 
-def test_http_endpoint(url, timeout=5):
-    """Test if HTTP endpoint is accessible"""
+async def test_http_endpoint(url, timeout=5):
+    """
+    Test if HTTP endpoint is serving requests
+    
+    The TCP connect in http_get only rules a service out: docker-proxy
+    accepts connections on published ports as soon as the container exists,
+    long before Kafka Connect has finished installing its plugins, so an
+    open port is confirmed with a request.
+    """
     try:
-        import urllib.request
-        req = urllib.request.Request(url)
-        urllib.request.urlopen(req, timeout=timeout)
+        await asyncio.to_thread(http_get, url, timeout)
         return True
-    except:
+    except Exception:
+        return False
+
+def list_kafka_topics():
+    """Return topic names from broker metadata (blocking)"""
+    admin = kafka_client().admin.AdminClient(KAFKA_CLIENT_CONFIG)
+    return admin.list_topics(timeout=KAFKA_TIMEOUT_SECONDS).topics
+
+@singleflight("kafka_metadata")
+async def kafka_topics():
+    """Return broker topic metadata, shared by the topic and message checks"""
+    return await asyncio.to_thread(list_kafka_topics)
+
+def kafka_has_messages(partitions):
+    """Fetch one message from the start of the given topic partitions (blocking)"""
+    kafka = kafka_client()
+    consumer = kafka.Consumer({
+        **KAFKA_CLIENT_CONFIG,
+        "group.id": "ats-pipeline-test",
+        "enable.auto.commit": False,
+        "auto.offset.reset": "earliest"
+    })
+    try:
+        # Assign partitions directly: no group join, no auto-created topic
+        consumer.assign([
+            kafka.TopicPartition(KAFKA_TOPIC, partition, kafka.OFFSET_BEGINNING)
+            for partition in partitions
+        ])
+        # Short polls return on the first message and step over error
+        # events instead of giving up on them
+        deadline = time.monotonic() + KAFKA_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            msg = consumer.poll(KAFKA_POLL_INTERVAL_SECONDS)
+            if msg is not None and msg.error() is None:
+                return True
         return False
+    finally:
+        consumer.close()
 
-def test_kafka_topic():
+async def test_kafka_topic():
     """Test if Kafka topic exists"""
-    result = run_command(
-        "docker exec kafka kafka-topics --bootstrap-server localhost:9092 --list",
-        check=False,
+    if kafka_client() is not None:
+        return KAFKA_TOPIC in await kafka_topics()
+    
+    return await run_command_contains(
+        ["docker", "exec", "kafka", "kafka-topics",
+         "--bootstrap-server", "localhost:9092", "--list"],
+        KAFKA_TOPIC,
         timeout=10
     )
-    return result and "ats_telemetry" in result
 
-def test_kafka_messages():
+async def test_kafka_messages():
     """Test if messages exist in Kafka"""
-    result = run_command(
-        "docker exec kafka kafka-console-consumer "
-        "--bootstrap-server localhost:9092 "
-        "--topic ats_telemetry "
-        "--from-beginning "
-        "--max-messages 1 "
-        "--timeout-ms 5000",
-        check=False,
+    if kafka_client() is not None:
+        topics = await kafka_topics()
+        if KAFKA_TOPIC not in topics:
+            return False
+        return await asyncio.to_thread(kafka_has_messages, topics[KAFKA_TOPIC].partitions)
+    
+    return await run_command_contains(
+        ["docker", "exec", "kafka", "kafka-console-consumer",
+         "--bootstrap-server", "localhost:9092",
+         "--topic", KAFKA_TOPIC,
+         "--from-beginning",
+         "--max-messages", "1",
+         "--timeout-ms", "5000"],
+        "",
         timeout=10
     )
-    return result is not None and len(result) > 0
 
-def test_snowflake_connector():
+async def test_snowflake_connector():
     """Test if Snowflake connector is running"""
     try:
-        import urllib.request
-        req = urllib.request.Request("http://localhost:8083/connectors/snowflake-sink-connector/status")
-        response = urllib.request.urlopen(req, timeout=5)
-        data = json.loads(response.read().decode())
-        return data.get("connector", {}).get("state") == "RUNNING"
-    except:
+        body = await asyncio.to_thread(
+            http_get,
+            "http://localhost:8083/connectors/snowflake-sink-connector/status"
+        )
+        # json.loads takes the raw bytes; a missing key means not running
+        return json.loads(body)["connector"]["state"] == "RUNNING"
+    except Exception:
         return False
 
 def print_header(title):
     """Print section header"""
-    print()
+    _write("\n")
     print_color(title, Colors.CYAN)
-    print_color("-" * 80, Colors.GRAY)
+    print_color(_DASHES, Colors.GRAY)
 
 def print_summary(results):
     """Print test summary"""
-    print()
-    print()
+    _write("\n")
+    _write("\n")
     print_color("📊 Test Summary", Colors.CYAN)
-    print_color("=" * 80, Colors.CYAN)
-    print()
-    print(f"  Total Tests: {results.total}")
+    print_color(_EQUALS, Colors.CYAN)
+    _write("\n")
+    _write(f"  Total Tests: {results.total}\n")
     print_color(f"  Passed:      {results.passed}", Colors.GREEN)
     print_color(f"  Failed:      {results.failed}", Colors.RED)
-    print()
+    _write("\n")
     
     pass_rate = results.pass_rate()
-    print("  Pass Rate:   ", end='')
+    _write("  Pass Rate:   ")
     
     if pass_rate >= 90:
         print_color(f"{pass_rate}% 🎉", Colors.GREEN)
@@ -167,38 +572,53 @@ def print_summary(results):
     else:
         print_color(f"{pass_rate}% ❌", Colors.RED)
     
-    print()
-    print_color("=" * 80, Colors.CYAN)
-    print()
+    _write("\n")
+    print_color(_EQUALS, Colors.CYAN)
+    _write("\n")
+
+def print_slowest(results, count=3):
+    """Print the checks that took longest to answer"""
+    slowest = heapq.nlargest(count, range(results.total), key=results.duration_ms.__getitem__)
+    # Cached and skipped checks were not timed
+    slowest = [i for i in slowest if results.duration_ms[i] > 0]
+    if not slowest:
+        return
+    
+    print_color("⏱️  Slowest Checks:", Colors.CYAN)
+    for i in slowest:
+        duration_ms = results.duration_ms[i]
+        color = Colors.YELLOW if duration_ms > SLOW_PROBE_MS else Colors.WHITE
+        print_color(f"  • {results.names[i]:<30} {duration_ms:8.1f} ms", color)
+    _write("\n")
 
 def print_troubleshooting():
     """Print troubleshooting steps"""
     print_color("🔧 Troubleshooting Steps:", Colors.YELLOW)
-    print()
+    _write("\n")
     
-    if not Path(".env").exists():
+    if not env_file_exists():
         print_color("  1. Create .env file: cp .env.example .env", Colors.WHITE)
     
     print_color("  2. Check Docker logs: docker-compose logs -f", Colors.WHITE)
     print_color("  3. Verify Snowflake credentials in .env", Colors.WHITE)
     print_color("  4. Register connector: python kafka_connect/register_connector.py", Colors.WHITE)
     print_color("  5. Restart services: docker-compose restart", Colors.WHITE)
-    print()
+    _write("\n")
 
 def print_success_info():
     """Print success information"""
     print_color("✅ All tests passed! Your pipeline is working correctly!", Colors.GREEN)
-    print()
+    _write("\n")
     print_color("🌐 Access Points:", Colors.CYAN)
     print_color("  • Dashboard:      http://localhost:8501", Colors.WHITE)
     print_color("  • Kafka Connect:  http://localhost:8083", Colors.WHITE)
-    print()
+    _write("\n")
     print_color("📝 Next Steps:", Colors.CYAN)
     print_color("  1. Open dashboard in browser", Colors.WHITE)
     print_color("  2. Verify data is appearing in Snowflake", Colors.WHITE)
     print_color("  3. Check alerts are triggering", Colors.WHITE)
     print_color("  4. Let it run for a few minutes to see trends", Colors.WHITE)
-    print()
+    _write("\n")
 
 def print_additional_commands():
     """Print additional useful commands"""
@@ -207,92 +627,161 @@ def print_additional_commands():
     print_color("  • Restart service:  docker-compose restart [service-name]", Colors.GRAY)
     print_color("  • Stop all:         docker-compose stop", Colors.GRAY)
     print_color("  • Check status:     docker-compose ps", Colors.GRAY)
-    print()
+    _write("\n")
 
-def main():
-    """Main function"""
-    print_color("🧪 ATS Pipeline Testing Script", Colors.CYAN)
-    print_color("=" * 80, Colors.CYAN)
-    print()
-    
-    results = TestResults()
-    
-    # Pre-Flight Checks
-    print_header("📋 Pre-Flight Checks")
-    
-    if test_component("Docker Desktop", test_docker,
-                      "Docker is running",
-                      "Docker Desktop is not running. Please start it."):
-        results.add_pass()
-    else:
-        results.add_fail()
-    
-    print()
+def load_cache():
+    """
+    Load the unexpired results of previous runs
     
-    if test_component(".env Configuration", test_env_file,
-                      ".env file found",
-                      ".env file missing. Copy .env.example to .env"):
-        results.add_pass()
-    else:
-        results.add_fail()
+    Returns:
+        Dict mapping check keys to [status, message, expiry] lists
+    """
+    try:
+        cache = json.loads(_CACHE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+    now = time.time()
+    return {key: entry for key, entry in cache.items() if entry[2] > now}
+
+def save_cache(cache):
+    """Write check results for the next run, ignoring unwritable temp dirs"""
+    try:
+        _CACHE_PATH.write_text(json.dumps(cache))
+    except OSError:
+        pass
+
+async def run_checks(cache):
+    """
+    Run every check concurrently and return the outcomes grouped by section.
     
-    # Docker Services Health
-    print_header("🐳 Docker Services Health")
+    The probes are I/O-bound, so a failing system costs roughly the slowest
+    single timeout instead of the sum of all of them. Each check may name a
+    prerequisite; when that check fails its dependents are cancelled and
+    reported as skipped instead of waiting out their own timeouts.
     
+    Returns:
+        list: (section title, [(name, status, message, cached, duration_ms), ...])
+        in display order
+    """
     services = [
         ("Zookeeper", "zookeeper", "Zookeeper container is up", "Zookeeper is not running"),
         ("Kafka Broker", "kafka", "Kafka broker is up", "Kafka is not running"),
         ("ATS Simulator", "ats-simulator", "ATS simulator is running", "ATS simulator is not running"),
     ]
     
-    for name, service, success, failure in services:
-        if test_component(name, lambda s=service: test_docker_service(s), success, failure):
-            results.add_pass()
-        else:
-            results.add_fail()
+    # (key, name, test, success message, failure message, prerequisite key)
+    sections = [
+        ("📋 Pre-Flight Checks", [
+            ("docker", "Docker Desktop", test_docker,
+             "Docker is running",
+             "Docker Desktop is not running. Please start it.", None),
+            ("env", ".env Configuration", test_env_file,
+             ".env file found",
+             ".env file missing. Copy .env.example to .env", None),
+        ]),
+        ("🐳 Docker Services Health", [
+            *((service, name, functools.partial(test_docker_service, service), success, failure, "docker")
+              for name, service, success, failure in services),
+            ("kafka_connect", "Kafka Connect", functools.partial(test_http_endpoint, "http://localhost:8083/connectors"),
+             "Kafka Connect REST API is responding",
+             "Kafka Connect is not accessible", "docker"),
+            ("dashboard", "Streamlit Dashboard", functools.partial(test_http_endpoint, "http://localhost:8501/_stcore/health"),
+             "Dashboard is accessible at http://localhost:8501",
+             "Dashboard is not accessible", None),
+        ]),
+        ("📡 Data Flow Verification", [
+            ("kafka_topic", "Kafka Topic (ats_telemetry)", test_kafka_topic,
+             "Topic 'ats_telemetry' exists",
+             "Topic not found. May need time to auto-create.", "kafka"),
+            ("kafka_messages", "Kafka Messages", test_kafka_messages,
+             "Messages are being produced to Kafka",
+             "No messages found. Check ATS simulator logs.", "kafka"),
+            ("snowflake_connector", "Snowflake Connector", test_snowflake_connector,
+             "Snowflake connector is RUNNING",
+             "Connector not running. Run register_connector.py", "kafka_connect"),
+        ]),
+    ]
     
-    # Test Kafka Connect HTTP endpoint
-    if test_component("Kafka Connect", lambda: test_http_endpoint("http://localhost:8083/"),
-                      "Kafka Connect REST API is responding",
-                      "Kafka Connect is not accessible"):
-        results.add_pass()
-    else:
-        results.add_fail()
+    tasks = {}
+    names = {}
+    dependents = {}
+    for _, checks in sections:
+        for key, name, test_func, success, failure, requires in checks:
+            if key in cache:
+                status, message, _ = cache[key]
+                coro = cached_component(name, status, message)
+            else:
+                coro = test_component(name, test_func, success, failure)
+            tasks[key] = asyncio.create_task(coro)
+            names[key] = name
+            if requires:
+                dependents.setdefault(requires, []).append(key)
     
-    # Test Streamlit Dashboard
-    if test_component("Streamlit Dashboard", lambda: test_http_endpoint("http://localhost:8501/_stcore/health"),
-                      "Dashboard is accessible at http://localhost:8501",
-                      "Dashboard is not accessible"):
-        results.add_pass()
-    else:
-        results.add_fail()
+    def cancel_dependents(key, task):
+        if task.cancelled() or task.result()[1] != "PASS":
+            for dependent in dependents.get(key, ()):
+                tasks[dependent].cancel()
     
-    # Data Flow Verification
-    print_header("📡 Data Flow Verification")
+    for key, task in tasks.items():
+        task.add_done_callback(functools.partial(cancel_dependents, key))
     
-    if test_component("Kafka Topic (ats_telemetry)", test_kafka_topic,
-                      "Topic 'ats_telemetry' exists",
-                      "Topic not found. May need time to auto-create."):
-        results.add_pass()
-    else:
-        results.add_fail()
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
     
-    if test_component("Kafka Messages", test_kafka_messages,
-                      "Messages are being produced to Kafka",
-                      "No messages found. Check ATS simulator logs."):
-        results.add_pass()
-    else:
-        results.add_fail()
+    # Prerequisites are listed before their dependents, so their final
+    # outcome is known here; a dependent that finished before its
+    # prerequisite failed is reported as skipped as well
+    outcomes = {}
+    for _, checks in sections:
+        for key, *_, requires in checks:
+            task = tasks[key]
+            if task.cancelled() or (requires and outcomes[requires][1] != "PASS"):
+                outcomes[key] = (names[key], "SKIP", f"Skipped because {names[requires]} did not pass", False, 0.0)
+            else:
+                outcomes[key] = task.result()
     
-    if test_component("Snowflake Connector", test_snowflake_connector,
-                      "Snowflake connector is RUNNING",
-                      "Connector not running. Run register_connector.py"):
-        results.add_pass()
-    else:
-        results.add_fail()
+    # Skipped checks leave no entry behind
+    now = time.time()
+    for key, (_, status, message, cached, _) in outcomes.items():
+        if status != "SKIP" and not cached:
+            ttl = CACHE_TTL_PASS_SECONDS if status == "PASS" else CACHE_TTL_FAIL_SECONDS
+            cache[key] = [status, message, now + ttl]
+    save_cache(cache)
+    
+    return [
+        (title, [outcomes[check[0]] for check in checks])
+        for title, checks in sections
+    ]
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Verify the ATS pipeline is working correctly")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="ignore results cached by recent runs")
+    parser.add_argument("--json", metavar="FILE", type=Path,
+                        help="also write the results to FILE as JSON")
+    args = parser.parse_args()
+    
+    print_color("🧪 ATS Pipeline Testing Script", Colors.CYAN)
+    print_color(_EQUALS, Colors.CYAN)
+    _write("\n")
+    # Show the banner while the checks run
+    flush_output()
+    
+    results = TestResults()
+    
+    for title, outcomes in asyncio.run(run_checks({} if args.no_cache else load_cache())):
+        print_header(title)
+        for outcome in outcomes:
+            print_component(outcome)
+            name, status, message, _, duration_ms = outcome
+            if status == "PASS":
+                results.add_pass(name, duration_ms)
+            else:
+                results.add_fail(name, duration_ms, message, Status[status])
     
     # Print Summary
     print_summary(results)
+    print_slowest(results)
     
     # Print recommendations
     if results.failed > 0:
@@ -301,6 +790,15 @@ def main():
         print_success_info()
     
     print_additional_commands()
+    
+    # A bad --json path is reported, not raised: the checks have already
+    # run and their report should stand on its own
+    if args.json:
+        try:
+            args.json.write_text(results.to_json())
+        except OSError as e:
+            print_color(f"❌ Could not write results to {args.json}: {e}", Colors.RED)
+    flush_output()
 
 if __name__ == "__main__":
     main()